@@ -0,0 +1,399 @@
+"""Benchmarks for javalink.
+
+Generates a synthetic classpath and a Sphinx project full of ``javaref``
+roles, then measures:
+
+- ``load``: parsing every class with ClassLoader.load
+- ``parse``: extracting every class with scan_class, after checking that
+  it gives the same result as javatools
+- ``parse_javatools``: extracting every class with javatools
+- ``resolve``: JavarefRole.find_ref for every reference
+- ``render``: JavarefRole.to_url and to_title for every reference
+- ``cold_build``: a Sphinx build with a fresh environment
+- ``warm_build``: a Sphinx build that rereads every document with the
+  environment saved by the cold build
+
+Each measurement runs in its own process so peak memory is reported per
+measurement. Results are written as JSON.
+
+Usage::
+
+    python benchmarks/run.py --jars 20 --classes 100 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from synthetic import SyntheticClasspath
+
+MEASUREMENTS = ('load', 'parse', 'parse_javatools', 'resolve', 'render', 'cold_build', 'warm_build')
+
+CONF_TEMPLATE = """\
+import sys
+sys.path.insert(0, {root!r})
+
+extensions = ['javalink']
+master_doc = 'index'
+javalink_classpath = {classpath!r}
+javalink_docroots = ['api']
+"""
+
+
+def generate_references(classpath, count, seed):
+    """Returns a list of (imports, reference text) tuples.
+
+    References use a mix of qualified names, imported names, nested
+    classes, fields, and overloaded methods.
+    """
+
+    rand = random.Random(seed)
+    methods = list(classpath.methods_of())
+
+    refs = []
+    for _ in range(count):
+        jar = rand.randrange(classpath.jars)
+        names = classpath.class_names(jar, rand.randrange(classpath.classes))
+        name = rand.choice(names).replace('$', '.')
+
+        kind = rand.randrange(4)
+        if kind == 0:
+            target = name
+        elif kind == 1:
+            target = '{}#field{}'.format(name, rand.randrange(max(classpath.fields, 1)))
+        else:
+            method, args = rand.choice(methods)
+            target = '{}#{}({})'.format(name, method, ', '.join(a[2] for a in args))
+
+        if rand.random() < 0.5:
+            # use an import
+            package = classpath.package(jar)
+            refs.append((package, target[len(package) + 1:]))
+        else:
+            refs.append((None, target))
+
+    return refs
+
+
+def write_project(directory, classpath, jar_paths, docs, refs_per_doc, seed):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    classpath.write_package_list(os.path.join(directory, 'api'))
+
+    with open(os.path.join(directory, 'conf.py'), 'w') as f:
+        f.write(CONF_TEMPLATE.format(root=os.path.dirname(HERE), classpath=jar_paths))
+
+    with open(os.path.join(directory, 'index.rst'), 'w') as f:
+        f.write('Benchmark\n=========\n\n.. toctree::\n\n')
+        for d in range(docs):
+            f.write('   doc{}\n'.format(d))
+
+    for d in range(docs):
+        refs = generate_references(classpath, refs_per_doc, seed + d)
+        imports = sorted(set(p for p, _ in refs if p))
+
+        with open(os.path.join(directory, 'doc{}.rst'.format(d)), 'w') as f:
+            f.write('Document {0}\n==========={1}\n\n'.format(d, '=' * len(str(d))))
+            if imports:
+                f.write('.. javaimport::\n')
+                for package in imports:
+                    f.write('   {}.*\n'.format(package))
+                f.write('\n')
+
+            for _, target in refs:
+                f.write(':javaref:`{}`\n'.format(target))
+
+
+def setup_workspace(args):
+    """Writes the classpath and project; returns a dict of paths."""
+    classpath = SyntheticClasspath(args.jars, args.classes, args.methods,
+                                   args.overloads, args.depth, args.fields)
+
+    workdir = args.workdir
+    jar_paths = classpath.write(os.path.join(workdir, 'jars'))
+
+    project = os.path.join(workdir, 'project')
+    write_project(project, classpath, jar_paths, args.docs, args.refs, args.seed)
+
+    return {'jars': jar_paths, 'project': project, 'build': os.path.join(workdir, 'build')}
+
+
+class _Config(object):
+    javalink_classpath = []
+    javalink_cache_dir = None
+    javalink_default_version = 7
+    javalink_add_package_names = True
+    javalink_qualify_nested_types = True
+    javalink_add_method_parameters = True
+
+
+class _Env(object):
+    def __init__(self, srcdir, classpath):
+        self.srcdir = srcdir
+        self.docname = 'bench'
+        self.config = _Config()
+        self.config.javalink_classpath = classpath
+        self.javalink_packages = {}
+        self.javalink_packages_versions = {}
+
+
+class _App(object):
+    def __init__(self, env):
+        self.env = env
+        self.config = env.config
+
+
+def _make_role(paths, imports):
+    from javalink import ref
+
+    env = _Env(paths['project'], paths['jars'])
+    app = _App(env)
+    role = ref.JavarefRole(app)
+    role.imports[env.docname] = [('java.lang', '*')] + [(p, '*') for p in imports]
+
+    with open(os.path.join(paths['project'], 'api', 'package-list')) as f:
+        for package in f:
+            env.javalink_packages[package.strip()] = 'api/'
+
+    return role
+
+
+def _all_references(paths):
+    refs = []
+    project = paths['project']
+    for name in sorted(os.listdir(project)):
+        if not name.startswith('doc'):
+            continue
+        with open(os.path.join(project, name)) as f:
+            for line in f:
+                if line.startswith(':javaref:'):
+                    refs.append(line.strip()[len(':javaref:`'):-1])
+    return refs
+
+
+def _imports(paths):
+    with open(os.path.join(paths['project'], 'api', 'package-list')) as f:
+        return [p.strip() for p in f]
+
+
+def measure_load(paths):
+    from javalink.loader import ClassLoader
+
+    loader = ClassLoader(paths['jars'])
+    names = []
+    for entry in sorted(loader.resources.entries):
+        names.append(entry[:-len('.class')].replace('/', '.'))
+
+    start = time.time()
+    for name in names:
+        loader.load(name).methods
+    elapsed = time.time() - start
+
+    loader.close()
+    return len(names), elapsed
+
+
+def _class_files(paths):
+    from javalink.jar import MappedJarFile
+
+    classes = []
+    for path in paths['jars']:
+        with MappedJarFile(path) as jar:
+            for name in jar.namelist():
+                if name.endswith('.class'):
+                    classes.append((name, str(jar.read(name))))
+    return classes
+
+
+def measure_parse(paths):
+    import javatools
+    from javalink.classfile import scan_class
+    from javalink.model import get_class_data
+
+    classes = _class_files(paths)
+    for name, data in classes:
+        if scan_class(data) != get_class_data(javatools.unpack_class(data)):
+            raise AssertionError('scan_class and javatools differ for {}'.format(name))
+
+    start = time.time()
+    for _, data in classes:
+        scan_class(data)
+    elapsed = time.time() - start
+
+    return len(classes), elapsed
+
+
+def measure_parse_javatools(paths):
+    import javatools
+    from javalink.model import get_class_data
+
+    classes = _class_files(paths)
+
+    start = time.time()
+    for _, data in classes:
+        get_class_data(javatools.unpack_class(data))
+    elapsed = time.time() - start
+
+    return len(classes), elapsed
+
+
+def measure_resolve(paths):
+    role = _make_role(paths, _imports(paths))
+    refs = _all_references(paths)
+
+    start = time.time()
+    for reftext in refs:
+        role.find_ref(reftext)
+    elapsed = time.time() - start
+
+    role.classloader.close()
+    return len(refs), elapsed
+
+
+def measure_render(paths):
+    role = _make_role(paths, _imports(paths))
+    resolved = [role.find_ref(r) for r in _all_references(paths)]
+
+    start = time.time()
+    for where, what in resolved:
+        role.to_url(where, what)
+        role.to_title(where, what)
+    elapsed = time.time() - start
+
+    role.classloader.close()
+    return len(resolved), elapsed
+
+
+def _build(paths, freshenv):
+    from sphinx.application import Sphinx
+
+    project = paths['project']
+    outdir = os.path.join(paths['build'], 'html')
+    doctreedir = os.path.join(paths['build'], 'doctrees')
+
+    with open(os.devnull, 'w') as devnull:
+        app = Sphinx(project, project, outdir, doctreedir, 'html',
+                     status=devnull, warning=devnull, freshenv=freshenv)
+
+        start = time.time()
+        app.build(force_all=True)
+        return time.time() - start
+
+
+def measure_cold_build(paths):
+    return len(_all_references(paths)), _build(paths, True)
+
+
+def measure_warm_build(paths):
+    now = time.time()
+    for name in os.listdir(paths['project']):
+        if name.endswith('.rst'):
+            os.utime(os.path.join(paths['project'], name), (now, now))
+
+    return len(_all_references(paths)), _build(paths, False)
+
+
+def run_measurement(name, paths):
+    """Runs a measurement in a child process and returns its results."""
+    cmd = [sys.executable, os.path.abspath(__file__), '--measure', name,
+           '--paths', json.dumps(paths)]
+    return json.loads(subprocess.check_output(cmd))
+
+
+def _child(name, paths):
+    ops, elapsed = globals()['measure_' + name](paths)
+    result = {
+        'operations': ops,
+        'seconds': elapsed,
+        'operations_per_second': ops / elapsed if elapsed else None,
+        # kilobytes on Linux, bytes on OS X
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    json.dump(result, sys.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run javalink benchmarks.')
+    parser.add_argument('--jars', type=int, default=10)
+    parser.add_argument('--classes', type=int, default=50,
+                        help='top-level classes per jar')
+    parser.add_argument('--methods', type=int, default=10,
+                        help='method names per class')
+    parser.add_argument('--overloads', type=int, default=4,
+                        help='overloads per method name')
+    parser.add_argument('--depth', type=int, default=2,
+                        help='nested classes per top-level class')
+    parser.add_argument('--fields', type=int, default=5)
+    parser.add_argument('--docs', type=int, default=20)
+    parser.add_argument('--refs', type=int, default=100,
+                        help='references per document')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', action='append', choices=MEASUREMENTS,
+                        help='run only the given measurement (repeatable)')
+    parser.add_argument('--workdir', help='keep generated files in this directory')
+    parser.add_argument('--output', help='write results to this file')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    parser.add_argument('--paths', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        _child(args.measure, json.loads(args.paths))
+        return
+
+    keep = bool(args.workdir)
+    if not keep:
+        args.workdir = tempfile.mkdtemp(prefix='javalink-bench-')
+
+    try:
+        paths = setup_workspace(args)
+
+        results = {}
+        for name in args.only or MEASUREMENTS:
+            if name == 'warm_build' and 'cold_build' not in results:
+                results['cold_build'] = run_measurement('cold_build', paths)
+            results[name] = run_measurement(name, paths)
+    finally:
+        if not keep:
+            shutil.rmtree(args.workdir)
+
+    report = {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'jars': args.jars,
+            'classes': args.classes,
+            'methods': args.methods,
+            'overloads': args.overloads,
+            'depth': args.depth,
+            'fields': args.fields,
+            'docs': args.docs,
+            'refs': args.refs,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
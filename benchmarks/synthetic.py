@@ -0,0 +1,391 @@
+"""Generates synthetic class files, jars, and runtime images for benchmarks.
+
+The generated classes are not executable; they only contain the parts of
+a class file that javalink reads: the class name, fields, and methods
+with their descriptors, access flags, and generic signatures.
+"""
+
+import os
+import struct
+import zipfile
+import zlib
+
+ACC_PUBLIC = 0x0001
+ACC_SUPER = 0x0020
+ACC_BRIDGE = 0x0040
+ACC_VARARGS = 0x0080
+ACC_SYNTHETIC = 0x1000
+
+CONSTANT_LONG = 5
+CONSTANT_DOUBLE = 6
+
+# (descriptor, generic signature or None, simple name used in references)
+ARG_TYPES = [
+    ('I', None, 'int'),
+    ('Ljava/lang/String;', None, 'String'),
+    ('J', None, 'long'),
+    ('Ljava/util/List;', 'Ljava/util/List<Ljava/lang/String;>;', 'List'),
+    ('[Ljava/lang/Object;', None, 'Object[]'),
+    ('Ljava/util/Map;', 'Ljava/util/Map<TK;TV;>;', 'Map'),
+    ('Z', None, 'boolean'),
+    ('[[D', None, 'double[][]'),
+]
+
+
+class ClassFileWriter(object):
+    """Builds the bytes of a minimal class file."""
+
+    def __init__(self, name, superclass='java/lang/Object'):
+        self.name = name
+        self.superclass = superclass
+        self.fields = []
+        self.methods = []
+        self.constants = []
+
+        self._pool = []
+        self._pool_index = {}
+
+    def add_field(self, name, descriptor='I'):
+        self.fields.append((name, descriptor))
+
+    def add_method(self, name, descriptor, access=ACC_PUBLIC, signature=None, attributes=()):
+        """Adds a method.
+
+        Args:
+            attributes: A sequence of (name, bytes) tuples for attributes
+                other than the Signature, e.g. Code or Synthetic (optional).
+        """
+        self.methods.append((name, descriptor, access, signature, attributes))
+
+    def add_constant(self, tag, value):
+        """Adds a Long or Double constant, which takes two pool entries."""
+        self.constants.append((tag, value))
+
+    def to_bytes(self):
+        this = self._class(self.name)
+        superclass = self._class(self.superclass)
+
+        for tag, value in self.constants:
+            fmt = '>Bq' if tag == CONSTANT_LONG else '>Bd'
+            self._pool.extend([struct.pack(fmt, tag, value), b''])
+
+        body = [struct.pack('>HHHH', ACC_PUBLIC | ACC_SUPER, this, superclass, 0)]
+
+        body.append(struct.pack('>H', len(self.fields)))
+        for name, descriptor in self.fields:
+            body.append(struct.pack('>HHHH', ACC_PUBLIC, self._utf8(name),
+                                    self._utf8(descriptor), 0))
+
+        body.append(struct.pack('>H', len(self.methods)))
+        for name, descriptor, access, signature, extra in self.methods:
+            attributes = []
+            if signature:
+                attributes.append(struct.pack('>HIH', self._utf8('Signature'), 2,
+                                              self._utf8(signature)))
+            for attribute, data in extra:
+                attributes.append(struct.pack('>HI', self._utf8(attribute), len(data)) + data)
+
+            body.append(struct.pack('>HHHH', access, self._utf8(name),
+                                    self._utf8(descriptor), len(attributes)))
+            body.extend(attributes)
+
+        # class attributes
+        body.append(struct.pack('>H', 0))
+
+        header = struct.pack('>IHHH', 0xCAFEBABE, 0, 50, len(self._pool) + 1)
+        return header + b''.join(self._pool) + b''.join(body)
+
+    def _utf8(self, value):
+        key = ('utf8', value)
+        if key not in self._pool_index:
+            data = _modified_utf8(value)
+            self._pool.append(struct.pack('>BH', 1, len(data)) + data)
+            self._pool_index[key] = len(self._pool)
+        return self._pool_index[key]
+
+    def _class(self, name):
+        key = ('class', name)
+        if key not in self._pool_index:
+            utf8 = self._utf8(name)
+            self._pool.append(struct.pack('>BH', 7, utf8))
+            self._pool_index[key] = len(self._pool)
+        return self._pool_index[key]
+
+
+def _modified_utf8(value):
+    """Encodes a string as the modified UTF-8 of class files.
+
+    The null character takes two bytes, and characters outside the Basic
+    Multilingual Plane are encoded as a pair of surrogates.
+    """
+
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+
+    def encode_unit(unit):
+        if unit == 0:
+            return b'\xc0\x80'
+        if unit < 0x80:
+            return struct.pack('>B', unit)
+        if unit < 0x800:
+            return struct.pack('>BB', 0xC0 | unit >> 6, 0x80 | unit & 0x3F)
+        return struct.pack('>BBB', 0xE0 | unit >> 12, 0x80 | unit >> 6 & 0x3F,
+                           0x80 | unit & 0x3F)
+
+    data = []
+    for c in value:
+        unit = ord(c)
+        if unit >= 0x10000:
+            unit -= 0x10000
+            data.append(encode_unit(0xD800 | unit >> 10))
+            data.append(encode_unit(0xDC00 | unit & 0x3FF))
+        else:
+            data.append(encode_unit(unit))
+    return b''.join(data)
+
+
+def _encode_attribute(kind, value):
+    data = []
+    while True:
+        data.insert(0, value & 0xFF)
+        value >>= 8
+        if not value:
+            break
+    return struct.pack('>B', (kind << 3) | (len(data) - 1)) + struct.pack('>{}B'.format(len(data)), *data)
+
+
+def write_jimage(path, resources, compressed=()):
+    """Writes a JDK runtime image (jimage) containing resources.
+
+    The image has the same layout as the lib/modules file of a JDK,
+    including the perfect hash table used for lookups.
+
+    Args:
+        path: The path of the image.
+        resources: A list of (full name, bytes) tuples. Full names have the
+            form '/module/package/path/Name.class'.
+        compressed: The full names of resources to compress as jlink's zip
+            plugin does (optional).
+    """
+
+    from javalink import jimage
+
+    strings = [b'\0']
+    string_offsets = {b'': 0}
+
+    def string(value):
+        if value not in string_offsets:
+            string_offsets[value] = sum(len(s) for s in strings)
+            strings.append(value + b'\0')
+        return string_offsets[value]
+
+    locations = []
+    location_offsets = []
+    content = []
+    content_size = 0
+    for name, data in resources:
+        module, _, path_in_module = name[1:].partition('/')
+        parent, _, base = path_in_module.rpartition('/')
+        base, dot, extension = base.rpartition('.') if '.' in base else (base, '', '')
+
+        size = len(data)
+        if name in compressed:
+            payload = zlib.compress(data)
+            header = struct.pack('<IQQIIB', jimage.COMPRESSED_MAGIC, len(payload), size,
+                                 string(b'zip'), 0, 1)
+            data = header + payload
+
+        attributes = [
+            (jimage.ATTRIBUTE_MODULE, string(module)),
+            (jimage.ATTRIBUTE_PARENT, string(parent)),
+            (jimage.ATTRIBUTE_BASE, string(base)),
+            (jimage.ATTRIBUTE_EXTENSION, string(extension)),
+            (jimage.ATTRIBUTE_OFFSET, content_size),
+            (jimage.ATTRIBUTE_COMPRESSED, len(data) if name in compressed else 0),
+            (jimage.ATTRIBUTE_UNCOMPRESSED, size),
+        ]
+        location = b''.join(_encode_attribute(k, v) for k, v in attributes if v)
+        location += struct.pack('>B', jimage.ATTRIBUTE_END)
+
+        location_offsets.append(sum(len(l) for l in locations))
+        locations.append(location)
+        content.append(data)
+        content_size += len(data)
+
+    redirect, order = _perfect_hash([name for name, _ in resources])
+    offsets = [location_offsets[i] for i in order]
+
+    locations = b''.join(locations)
+    strings = b''.join(strings)
+    length = len(resources)
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<7I', jimage.MAGIC, jimage.MAJOR_VERSION << 16, 0, length,
+                            length, len(locations), len(strings)))
+        f.write(struct.pack('<{}i'.format(length), *redirect))
+        f.write(struct.pack('<{}I'.format(length), *offsets))
+        f.write(locations)
+        f.write(strings)
+        for data in content:
+            f.write(data)
+
+
+def _perfect_hash(names):
+    """Builds a jimage lookup table as the JDK's PerfectHashBuilder does.
+
+    Returns:
+        A tuple of (redirect table, order), where order[i] is the position
+        in names of the entry stored at index i.
+    """
+
+    from javalink.jimage import hash_code
+
+    length = len(names)
+    buckets = [[] for _ in range(length)]
+    for i, name in enumerate(names):
+        buckets[hash_code(name) % length].append(i)
+
+    redirect = [0] * length
+    order = [None] * length
+    free = 0
+
+    for b in sorted(range(length), key=lambda b: -len(buckets[b])):
+        bucket = buckets[b]
+        if len(bucket) > 1:
+            seed = 1
+            while True:
+                slots = [hash_code(names[i], seed) % length for i in bucket]
+                if len(set(slots)) == len(slots) and all(order[s] is None for s in slots):
+                    break
+                seed += 1
+
+            redirect[b] = seed
+            for i, slot in zip(bucket, slots):
+                order[slot] = i
+        elif bucket:
+            while order[free] is not None:
+                free += 1
+            redirect[b] = -1 - free
+            order[free] = bucket[0]
+
+    return redirect, order
+
+
+def overload_args(n, arity):
+    """Returns the argument types of the nth overload with an arity."""
+    args = []
+    for _ in range(arity):
+        args.append(ARG_TYPES[n % len(ARG_TYPES)])
+        n //= len(ARG_TYPES)
+    return args
+
+
+class SyntheticClasspath(object):
+    """Describes a generated classpath and writes it to disk.
+
+    Each jar contains one package with a number of top-level classes. Each
+    top-level class has a chain of nested classes and a number of methods
+    with several overloads each.
+
+    Args:
+        jars: The number of jars.
+        classes: The number of top-level classes per jar.
+        methods: The number of distinct method names per class.
+        overloads: The number of overloads of each method.
+        depth: The number of nested classes in each top-level class.
+        fields: The number of fields per class.
+    """
+
+    def __init__(self, jars=10, classes=50, methods=10, overloads=4, depth=2, fields=5):
+        self.jars = jars
+        self.classes = classes
+        self.methods = methods
+        self.overloads = overloads
+        self.depth = depth
+        self.fields = fields
+
+    def package(self, jar):
+        return 'bench.j{}'.format(jar)
+
+    def class_names(self, jar, i):
+        """Returns the binary names of a top-level class and its nested classes."""
+        name = '{}.J{}C{}'.format(self.package(jar), jar, i)
+        names = [name]
+        for d in range(1, self.depth + 1):
+            name = '{}$N{}'.format(name, d)
+            names.append(name)
+        return names
+
+    def methods_of(self):
+        """Yields (name, args) for every method of a class."""
+        for m in range(self.methods):
+            for o in range(self.overloads):
+                yield 'method{}'.format(m), overload_args(o, 1 + o // len(ARG_TYPES))
+
+    def write_class(self, name):
+        writer = ClassFileWriter(name.replace('.', '/'))
+        writer.add_method('<init>', '()V')
+
+        for f in range(self.fields):
+            writer.add_field('field{}'.format(f))
+
+        for method, args in self.methods_of():
+            descriptor = '({})V'.format(''.join(a[0] for a in args))
+            if any(a[1] for a in args):
+                signature = '({})V'.format(''.join(a[1] or a[0] for a in args))
+                if '<TK;TV;>' in signature:
+                    signature = '<K:Ljava/lang/Object;V:Ljava/lang/Object;>' + signature
+            else:
+                signature = None
+
+            access = ACC_PUBLIC
+            if args[-1][0].startswith('['):
+                access |= ACC_VARARGS
+
+            writer.add_method(method, descriptor, access, signature)
+
+        return writer.to_bytes()
+
+    def write(self, directory, compression=zipfile.ZIP_DEFLATED):
+        """Writes all jars to a directory and returns their paths."""
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        paths = []
+        for j in range(self.jars):
+            path = os.path.join(directory, 'bench{}.jar'.format(j))
+            with zipfile.ZipFile(path, 'w', compression) as jar:
+                for i in range(self.classes):
+                    for name in self.class_names(j, i):
+                        entry = name.replace('.', '/') + '.class'
+                        jar.writestr(entry, self.write_class(name))
+            paths.append(path)
+
+        return paths
+
+    def write_jimage(self, path, module='bench'):
+        """Writes all classes to a runtime image and returns its path."""
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        resources = []
+        for j in range(self.jars):
+            for i in range(self.classes):
+                for name in self.class_names(j, i):
+                    entry = '/{}/{}.class'.format(module, name.replace('.', '/'))
+                    resources.append((entry, self.write_class(name)))
+
+            # the directory entries a JDK image has for each package
+            resources.append(('/packages/{}/{}'.format(self.package(j), module), b''))
+
+        write_jimage(path, resources)
+        return path
+
+    def write_package_list(self, directory):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        with open(os.path.join(directory, 'package-list'), 'w') as f:
+            for j in range(self.jars):
+                f.write(self.package(j) + '\n')
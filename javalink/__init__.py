@@ -1,3 +1,4 @@
+import json
 import os
 import subprocess
 import sys
@@ -5,12 +6,16 @@ import sys
 from sphinx.errors import ExtensionError
 
 from . import ref
+from .stats import Stats
 
 def setup(app):
     """Register the extension with Sphinx.
 
     Args:
         app: The Sphinx application.
+
+    Returns:
+        The extension metadata.
     """
 
     for name, (default, rebuild, _) in ref.CONFIG_VALUES.iteritems():
@@ -18,16 +23,34 @@ def setup(app):
 
     app.add_directive('javaimport', ref.JavarefImportDirective)
     app.add_role('javaref', ref.JavarefRole(app))
+    app.add_transform(ref.ResolvePendingRefs)
 
     app.connect('builder-inited', initialize_env)
+    app.connect('env-get-outdated', ref.find_outdated_docs)
+    app.connect('env-before-read-docs', ref.preload_package_list)
     app.connect('env-purge-doc', ref.purge_imports)
+    app.connect('env-purge-doc', ref.purge_dependencies)
+    app.connect('env-purge-doc', ref.purge_links)
+    app.connect('env-purge-doc', ref.purge_references)
     app.connect('env-merge-info', ref.merge_imports)
+    app.connect('env-merge-info', ref.merge_dependencies)
+    app.connect('env-merge-info', ref.merge_links)
+    app.connect('env-merge-info', ref.merge_references)
+    app.connect('env-merge-info', ref.merge_classloader)
+    app.connect('env-merge-info', ref.merge_stats)
+    app.connect('env-updated', ref.prune_references)
+    app.connect('env-updated', ref.verify_anchors)
     app.connect('build-finished', ref.cleanup)
+    app.connect('build-finished', ref.report_stats)
+
+    return {'parallel_read_safe': True}
 
 
 def initialize_env(app):
+    app.env.javalink_stats = Stats()
     validate_env(app)
-    ref.initialize_package_list(app)
+    ref.validate_references(app)
+    ref.warm_up_classloader(app)
 
 def validate_env(app):
     """Purge expired values from the environment.
@@ -45,6 +68,11 @@ def validate_env(app):
     if not hasattr(app.env, 'javalink_config_cache'):
         app.env.javalink_config_cache = {}
 
+    loader = getattr(app.env, 'javalink_classloader', None)
+    if loader and loader.stale:
+        app.verbose('[javalink] classloader format has changed, clearing related env')
+        del app.env.javalink_classloader
+
     for conf_attr, (_, _, env_attr) in ref.CONFIG_VALUES.iteritems():
         if not env_attr:
             continue
@@ -53,17 +81,18 @@ def validate_env(app):
         cached = app.env.javalink_config_cache.get(conf_attr, value)
 
         app.env.javalink_config_cache[conf_attr] = value
-        if value != cached:
+        if value != cached and hasattr(app.env, env_attr):
             app.verbose('[javalink] config.%s has changed, clearing related env', conf_attr)
             delattr(app.env, env_attr)
 
 
-def find_rt_jar(javahome=None):
-    """Find the path to the Java standard library jar.
+def find_rt_jar(javahome=None, cache_dir=None):
+    """Find the path to the Java standard library.
 
-    The jar is expected to exist at the path 'jre/lib/rt.jar' inside a
-    standard Java installation directory. The directory is found using
-    the following procedure:
+    For Java 8 and earlier, this is the jar at the path 'jre/lib/rt.jar'
+    (or 'lib/rt.jar' in a JRE) inside a standard Java installation
+    directory. For Java 9 and later, this is the runtime image at the path
+    'lib/modules'. The directory is found using the following procedure:
 
     1. If the javehome argument is provided, use the value as the
        directory.
@@ -72,27 +101,90 @@ def find_rt_jar(javahome=None):
     3. Find the location of the ``java`` binary in the current PATH and
        compute the installation directory from this location.
 
+    The directory found in the last step is cached for the resolved
+    ``java`` binary and its modification time, so the search runs again
+    when a different Java installation is selected. The cache is kept in
+    memory, and in a file in cache_dir if it is given.
+
     Args:
         javahome: A path to a Java installation directory (optional).
+        cache_dir: A directory for the cache file, usually the value of
+            javalink_cache_dir (optional).
     """
 
     if not javahome:
         if 'JAVA_HOME' in os.environ:
             javahome = os.environ['JAVA_HOME']
-        elif sys.platform == 'darwin':
-            # The default java binary on OS X is not part of a standard Oracle
-            # install, so building paths relative to it does not work like it
-            # does on other platforms.
-            javahome = _find_osx_javahome()
         else:
-            javahome = _get_javahome_from_java(_find_java_binary())
+            javahome = _find_cached_javahome(cache_dir)
+
+    candidates = [
+        os.path.join(javahome, 'jre', 'lib', 'rt.jar'),
+        os.path.join(javahome, 'lib', 'rt.jar'),
+        os.path.join(javahome, 'lib', 'modules'),
+    ]
+
+    for rtpath in candidates:
+        if os.path.isfile(rtpath):
+            return rtpath
+
+    msg = 'Could not find rt.jar or lib/modules in {}'.format(javahome)
+    raise ExtensionError(msg)
+
+
+# {'java binary:mtime' : Java installation directory}
+_javahome_cache = {}
+
+
+def _find_cached_javahome(cache_dir=None):
+    # alternatives systems switch installations by replacing links, so
+    # the binary the links resolve to identifies the installation
+    java = os.path.realpath(_find_java_binary())
+    key = '{}:{}'.format(java, os.path.getmtime(java))
+
+    javahome = _javahome_cache.get(key)
+    if javahome and os.path.isdir(javahome):
+        return javahome
+
+    cache_file = os.path.join(cache_dir, 'javahome.json') if cache_dir else None
+
+    cached = {}
+    if cache_file:
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+        except (IOError, ValueError):
+            pass
+        if not isinstance(cached, dict):
+            cached = {}
+
+    javahome = cached.get(key)
+    if not javahome or not os.path.isdir(javahome):
+        javahome = _find_javahome(java)
+
+        if cache_file:
+            cached[key] = javahome
+            try:
+                if not os.path.isdir(cache_dir):
+                    os.makedirs(cache_dir)
+                with open(cache_file, 'w') as f:
+                    json.dump(cached, f)
+            except (IOError, OSError):
+                # the cache is only an optimization
+                pass
+
+    _javahome_cache[key] = javahome
+    return javahome
 
-    rtpath = os.path.join(javahome, 'jre', 'lib', 'rt.jar')
-    if not os.path.isfile(rtpath):
-        msg = 'Could not find rt.jar: {} is not a file'.format(rtpath)
-        raise ExtensionError(msg)
 
-    return rtpath
+def _find_javahome(java):
+    if sys.platform == 'darwin':
+        # The default java binary on OS X is not part of a standard Oracle
+        # install, so building paths relative to it does not work like it
+        # does on other platforms.
+        return _find_osx_javahome()
+    else:
+        return _get_javahome_from_java(java)
 
 
 def _find_osx_javahome():
@@ -106,7 +198,9 @@ def _get_javahome_from_java(java):
         if not os.path.isabs(java):
             java = os.path.join(os.path.dirname(link), java)
 
-    javahome = os.path.join(os.path.dirname(java), '..', '..')
+    # the binary is in the 'bin' directory of a JDK or a JRE; find_rt_jar
+    # checks the layouts of both
+    javahome = os.path.join(os.path.dirname(java), '..')
     return os.path.normpath(javahome)
 
 
@@ -0,0 +1,109 @@
+import codecs
+import os
+
+from HTMLParser import HTMLParser, HTMLParseError
+from multiprocessing.pool import ThreadPool
+
+# maximum number of pages to scan at the same time
+MAX_SCAN_THREADS = 8
+
+_CHUNK_SIZE = 1 << 16
+
+
+class AnchorParser(HTMLParser):
+    """Collects the targets of URL fragments in an HTML page.
+
+    Javadoc 8 and earlier mark members with named 'a' elements; later
+    versions use 'id' attributes.
+    """
+
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.anchors = set()
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if value and (name == 'id' or (name == 'name' and tag == 'a')):
+                self.anchors.add(value)
+
+    handle_startendtag = handle_starttag
+
+
+def read_anchors(path):
+    """Returns the set of anchors in an HTML file.
+
+    The file is parsed as it is read, so large pages are never held in
+    memory at once.
+
+    Raises:
+        IOError: The file can't be read.
+        HTMLParseError: The file is not valid HTML.
+    """
+
+    parser = AnchorParser()
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            parser.feed(decoder.decode(chunk))
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    return frozenset(parser.anchors)
+
+
+def find_anchors(paths, cache=None):
+    """Finds the anchors in a group of HTML files concurrently.
+
+    Args:
+        paths: An iterable of file paths.
+        cache: A dict from file path to a tuple of (size, mtime, anchors)
+            that is used for files that did not change and is updated
+            with files that were read (optional).
+
+    Returns:
+        A dict from each path to a frozenset of its anchors, or None if the
+        file doesn't exist or can't be parsed.
+    """
+
+    if cache is None:
+        cache = {}
+
+    anchors = {}
+    pending = []
+    for path in set(paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            anchors[path] = None
+            continue
+
+        cached = cache.get(path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime):
+            anchors[path] = cached[2]
+        else:
+            pending.append((path, stat))
+
+    if not pending:
+        return anchors
+
+    pool = ThreadPool(min(len(pending), MAX_SCAN_THREADS))
+    try:
+        results = pool.map(_read_anchors, [path for path, _ in pending])
+    finally:
+        pool.close()
+        pool.join()
+
+    for (path, stat), result in zip(pending, results):
+        anchors[path] = result
+        if result is not None:
+            cache[path] = (stat.st_size, stat.st_mtime, result)
+        else:
+            cache.pop(path, None)
+
+    return anchors
+
+
+def _read_anchors(path):
+    try:
+        return read_anchors(path)
+    except (IOError, HTMLParseError):
+        return None
@@ -0,0 +1,238 @@
+import contextlib
+import cPickle as pickle
+import errno
+import hashlib
+import os
+import tempfile
+
+from urlparse import urlparse
+
+CACHE_VERSION = 1
+
+_CHUNK_SIZE = 1 << 16
+
+
+def jar_identity(path, known=None):
+    """Computes the identity of a jar file.
+
+    Hashing a large jar, such as a JDK runtime image, is slow, so the
+    content hash is only computed if the path, size, or mtime of the jar
+    differ from a known identity.
+
+    Args:
+        path: The path to a jar file.
+        known: An identity computed earlier for the jar (optional).
+
+    Returns:
+        A tuple of (real path, size, mtime, SHA-1 hex digest).
+    """
+
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+
+    if known and tuple(known[:3]) == (path, stat.st_size, stat.st_mtime):
+        return tuple(known)
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            sha1.update(chunk)
+
+    return (path, stat.st_size, stat.st_mtime, sha1.hexdigest())
+
+
+class ClassCache(object):
+    """A persistent store of class data for the jars on a classpath.
+
+    Each jar has its own file in the cache directory that holds the data
+    of every class read from the jar so far. A file is only used if the
+    content hash of the jar matches the hash recorded when it was written;
+    otherwise, it is discarded. The hash is only computed again if the
+    path, size, or mtime of the jar changed. Directories are never cached.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+        # {jar path : JarCache}
+        self.jars = {}
+
+    def get(self, path, entry):
+        """Returns cached class data for a jar entry or None."""
+        jar = self._get_jar(path)
+        if jar is None:
+            return None
+        return jar.classes.get(entry)
+
+    def put(self, path, entry, data):
+        jar = self._get_jar(path)
+        if jar is not None:
+            jar.classes[entry] = data
+            jar.dirty = True
+
+    def flush(self):
+        """Writes all modified jar caches to disk."""
+        for jar in self.jars.itervalues():
+            if jar is not None and jar.dirty:
+                jar.write()
+
+    def _get_jar(self, path):
+        try:
+            return self.jars[path]
+        except KeyError:
+            if os.path.isdir(path):
+                jar = None
+            else:
+                jar = JarCache(self._cache_file(path), path)
+                jar.read()
+
+            self.jars[path] = jar
+            return jar
+
+    def _cache_file(self, path):
+        return _cache_file(self.directory, 'classes', os.path.abspath(path))
+
+
+class JarCache(object):
+    def __init__(self, filename, path):
+        self.filename = filename
+        self.path = path
+        self.identity = None
+        self.dirty = False
+
+        # {entry path : class data}
+        self.classes = {}
+
+    def read(self):
+        state = _read_state(self.filename)
+        if state is None or state[0] != CACHE_VERSION:
+            # the identity is computed when the cache is written
+            return
+
+        _, identity, classes = state
+        self.identity = jar_identity(self.path, identity)
+        if self.identity[3] == identity[3]:
+            self.classes = classes
+            # a jar that was only touched keeps its classes, but the new
+            # mtime is recorded so it isn't hashed again
+            self.dirty = self.identity != identity
+
+    def write(self):
+        if self.identity is None:
+            self.identity = jar_identity(self.path)
+        _write_state(self.filename, (CACHE_VERSION, self.identity, self.classes))
+        self.dirty = False
+
+
+class UrlCache(object):
+    """A persistent cache of files fetched from docroots.
+
+    Files fetched over HTTP are stored with their ETag and Last-Modified
+    headers, which are sent with later requests for the same URL so that
+    unchanged files are not downloaded again. If the server can't be
+    reached, sends an invalid response, or responds with a server error
+    (5xx) or 429, the cached copy is used. Other URLs are never cached.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, url, timeout=None):
+        """Returns the contents of a URL.
+
+        Raises:
+            urllib2.URLError: The URL could not be fetched and is not
+                cached.
+            socket.error: The connection failed and the URL is not cached.
+            httplib.HTTPException: The server sent an invalid response and
+                the URL is not cached.
+        """
+
+        # only needed for docroots, not for the class cache
+        import httplib
+        import socket
+        import urllib2
+
+        if urlparse(url).scheme not in ('http', 'https'):
+            with contextlib.closing(urllib2.urlopen(url, timeout=timeout)) as f:
+                return read_response(f)
+
+        filename = _cache_file(self.directory, 'docroots', url)
+        cached = _read_state(filename)
+        if cached and (cached[0] != CACHE_VERSION or cached[1] != url):
+            cached = None
+
+        request = urllib2.Request(url)
+        if cached:
+            _, _, etag, last_modified, content = cached
+            if etag:
+                request.add_header('If-None-Match', etag)
+            if last_modified:
+                request.add_header('If-Modified-Since', last_modified)
+
+        try:
+            with contextlib.closing(urllib2.urlopen(request, timeout=timeout)) as f:
+                content = read_response(f)
+                etag = f.info().getheader('ETag')
+                last_modified = f.info().getheader('Last-Modified')
+        except urllib2.HTTPError as e:
+            # the server either has no newer copy or is unavailable
+            if cached and (e.code == 304 or e.code == 429 or e.code >= 500):
+                return cached[4]
+            raise
+        except (urllib2.URLError, socket.error, httplib.HTTPException):
+            if cached:
+                return cached[4]
+            raise
+
+        _write_state(filename, (CACHE_VERSION, url, etag, last_modified, content))
+        return content
+
+
+def read_response(response):
+    """Reads the body of a urllib2 response.
+
+    urllib2 returns a short body if the connection is closed early, so its
+    length is checked against the Content-Length header.
+
+    Raises:
+        httplib.IncompleteRead: The body is shorter than its header says.
+    """
+
+    import httplib
+
+    content = response.read()
+    length = response.info().getheader('Content-Length')
+    if length and length.isdigit() and len(content) < int(length):
+        raise httplib.IncompleteRead(content, int(length) - len(content))
+    return content
+
+
+def _cache_file(directory, kind, key):
+    key = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(directory, kind, key + '.pickle')
+
+
+def _read_state(filename):
+    try:
+        with open(filename, 'rb') as f:
+            return pickle.load(f)
+    except (IOError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+
+
+def _write_state(filename, state):
+    directory = os.path.dirname(filename)
+    try:
+        os.makedirs(directory)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    # write to a temporary file and rename so that concurrent builds
+    # never observe a partially written file
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+
+    os.rename(tmp, filename)
@@ -0,0 +1,181 @@
+import struct
+
+from .model import get_method_args
+
+_MAGIC = b'\xca\xfe\xba\xbe'
+
+_U2 = struct.Struct('>H')
+_U2_U2 = struct.Struct('>HH')
+_MEMBER = struct.Struct('>HHHH')
+_ATTRIBUTE = struct.Struct('>HL')
+
+_CONSTANT_UTF8 = 1
+_CONSTANT_CLASS = 7
+_CONSTANT_LONG = 5
+_CONSTANT_DOUBLE = 6
+
+# the size of every constant type other than Utf8, including the tag
+_CONSTANT_SIZES = {
+    3: 5,   # Integer
+    4: 5,   # Float
+    5: 9,   # Long
+    6: 9,   # Double
+    7: 3,   # Class
+    8: 3,   # String
+    9: 5,   # Fieldref
+    10: 5,  # Methodref
+    11: 5,  # InterfaceMethodref
+    12: 5,  # NameAndType
+    15: 4,  # MethodHandle
+    16: 3,  # MethodType
+    17: 5,  # Dynamic
+    18: 5,  # InvokeDynamic
+    19: 3,  # Module
+    20: 3,  # Package
+}
+
+_ACC_BRIDGE = 0x0040
+_ACC_VARARGS = 0x0080
+_ACC_SYNTHETIC = 0x1000
+
+
+def scan_class(data):
+    """Extracts the linkable parts of a class from the bytes of its class file.
+
+    Produces the same result as get_class_data, but only decodes the
+    constants it needs and skips code and all other attributes instead of
+    building a complete model of the class. Unlike javatools, methods with
+    an (always empty) Synthetic attribute are treated as synthetic, and
+    class files with invokedynamic constants can be read.
+
+    Args:
+        data: A string or buffer containing a class file.
+
+    Returns:
+        A tuple of (binary name, field names, methods), as returned by
+        get_class_data.
+
+    Raises:
+        ValueError: The data is not a valid class file.
+    """
+
+    try:
+        return _ClassScanner(data).scan()
+    except (struct.error, IndexError, KeyError):
+        raise ValueError('Invalid class file')
+
+
+class _ClassScanner(object):
+    def __init__(self, data):
+        if data[:4] != _MAGIC:
+            raise ValueError('Invalid class file magic number')
+
+        self.data = data
+        self.offset = 8
+
+        # {constant index : offset of the Utf8 length}
+        self.utf8_offsets = {}
+        # {constant index : Utf8 constant index}
+        self.class_names = {}
+        # {constant index : decoded string}
+        self.strings = {}
+
+    def scan(self):
+        self._read_constant_pool()
+
+        data = self.data
+        _, this = _U2_U2.unpack_from(data, self.offset)
+        (interfaces,) = _U2.unpack_from(data, self.offset + 6)
+        self.offset += 8 + 2 * interfaces
+
+        fields = tuple(name for _, name, _, _ in self._read_members())
+
+        methods = []
+        for access, name, descriptor, signature in self._read_members():
+            if access & (_ACC_BRIDGE | _ACC_SYNTHETIC) or name == '<clinit>':
+                continue
+
+            args = get_method_args(descriptor, signature)
+            methods.append((name, args, bool(access & _ACC_VARARGS)))
+
+        return (self._string(self.class_names[this]), fields, tuple(methods))
+
+    def _read_constant_pool(self):
+        data = self.data
+        (count,) = _U2.unpack_from(data, self.offset)
+        offset = self.offset + 2
+
+        utf8_offsets = self.utf8_offsets
+        class_names = self.class_names
+        unpack_u2 = _U2.unpack_from
+
+        i = 1
+        while i < count:
+            tag = ord(data[offset])
+            if tag == _CONSTANT_UTF8:
+                utf8_offsets[i] = offset + 1
+                offset += 3 + unpack_u2(data, offset + 1)[0]
+            else:
+                if tag == _CONSTANT_CLASS:
+                    class_names[i] = unpack_u2(data, offset + 1)[0]
+                elif tag == _CONSTANT_LONG or tag == _CONSTANT_DOUBLE:
+                    # eight byte constants take two entries
+                    i += 1
+                offset += _CONSTANT_SIZES[tag]
+            i += 1
+
+        self.offset = offset
+
+    def _read_members(self):
+        """Returns (access flags, name, descriptor, signature) for a member table.
+
+        The synthetic flag is added to the access flags of members with a
+        Synthetic attribute.
+        """
+
+        data = self.data
+        (count,) = _U2.unpack_from(data, self.offset)
+        offset = self.offset + 2
+
+        string = self._string
+        unpack_member = _MEMBER.unpack_from
+        unpack_attribute = _ATTRIBUTE.unpack_from
+
+        members = []
+        for _ in xrange(count):
+            access, name, descriptor, attributes = unpack_member(data, offset)
+            offset += 8
+
+            signature = None
+            for _ in xrange(attributes):
+                attribute, length = unpack_attribute(data, offset)
+                offset += 6
+
+                attribute_name = string(attribute)
+                if attribute_name == 'Signature':
+                    signature = string(_U2.unpack_from(data, offset)[0])
+                elif attribute_name == 'Synthetic':
+                    access |= _ACC_SYNTHETIC
+
+                offset += length
+
+            members.append((access, string(name), string(descriptor), signature))
+
+        self.offset = offset
+        return members
+
+    def _string(self, index):
+        try:
+            return self.strings[index]
+        except KeyError:
+            offset = self.utf8_offsets[index]
+            (length,) = _U2.unpack_from(self.data, offset)
+            value = self.data[offset + 2:offset + 2 + length]
+            try:
+                value = value.decode('utf8')
+            except UnicodeDecodeError:
+                # Java's modified UTF-8 encodes the null character as two bytes
+                value = value.replace(b'\xc0\x80', b'\x00').decode('utf8')
+
+            self.strings[index] = value
+            return value
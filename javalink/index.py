@@ -0,0 +1,200 @@
+"""Builds classpath index files.
+
+An index file holds the names of all classes on a classpath and the
+linkable parts of each class, so it can be put on ``javalink_classpath``
+in place of the jars and directories it was built from. Documentation
+builds that use an index never open or parse a jar.
+
+Usage::
+
+    python -m javalink.index -o classes.idx lib/library.jar build/classes 'lib/deps/*'
+"""
+
+import argparse
+import cPickle as pickle
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+from itertools import chain as flatten
+
+from .jar import offset_array
+
+# the version of the index file format
+INDEX_VERSION = 1
+
+_MAGIC = b'JLINKIDX'
+
+# magic, version, table offset; the header is followed by a compressed
+# pickle of the class data of each entry and a compressed table of entries
+_HEADER = struct.Struct('>8sIQ')
+
+
+def is_index(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(_MAGIC)) == _MAGIC
+    except IOError:
+        return False
+
+
+def write_index(paths, filename):
+    """Writes an index of the classes on a classpath.
+
+    Classes are read in the order they are stored on the classpath. If a
+    class exists in more than one resource, the first is used.
+
+    Args:
+        paths: A list of classpath entries, in the format of
+            javalink_classpath.
+        filename: The path of the index file.
+
+    Returns:
+        The number of indexed classes.
+    """
+
+    # the loader reads index files, so it can't be imported first
+    from .loader import ResourceLoader, expand_path, extract_class
+
+    resources = ResourceLoader(flatten.from_iterable(expand_path(p) for p in paths))
+    entries = resources.entries
+
+    names = []
+    offsets = []
+    lengths = []
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, INDEX_VERSION, 0))
+
+            for entry in sorted(entries, key=resources.position):
+                data = extract_class(resources.open(entries[entry]), entry)
+                record = zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+                names.append(entry)
+                offsets.append(f.tell())
+                lengths.append(len(record))
+                f.write(record)
+
+            table_offset = f.tell()
+            table = (tuple(resources.paths), names, offsets, lengths)
+            f.write(zlib.compress(pickle.dumps(table, pickle.HIGHEST_PROTOCOL)))
+
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, INDEX_VERSION, table_offset))
+    except:
+        os.remove(tmp)
+        raise
+    finally:
+        resources.close()
+
+    # mkstemp creates files that only the owner can read
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp, 0o666 & ~umask)
+    os.rename(tmp, filename)
+    return len(names)
+
+
+class ClassIndexFile(object):
+    """A read-only index file written by write_index.
+
+    Supports the subset of the ZipFile interface used by the ClassLoader.
+    Instead of class files, entries contain the class data that would be
+    extracted from them, which read_class returns.
+
+    Attributes:
+        sources: The resources the index was built from.
+
+    Raises:
+        ValueError: The file is not an index or was written by an
+            incompatible version of javalink.
+    """
+
+    def __init__(self, path):
+        self.filename = path
+
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, table_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != INDEX_VERSION or not table_offset:
+            self.close()
+            msg = 'Invalid or incompatible index file {}; rebuild it with python -m javalink.index'
+            raise ValueError(msg.format(path))
+
+        table = pickle.loads(zlib.decompress(self._map[table_offset:]))
+        self.sources, self._names, offsets, lengths = table
+
+        self._offsets = offset_array(offsets)
+        self._lengths = offset_array(lengths)
+
+        # {entry name : position}
+        self._positions = dict((name, i) for i, name in enumerate(self._names))
+
+    def namelist(self):
+        return list(self._names)
+
+    def getinfo(self, name):
+        return IndexEntry(name, self._offsets[self._position(name)])
+
+    def read_class(self, name):
+        """Returns the class data for an entry."""
+        if self._map is None:
+            raise RuntimeError('Attempt to read an index that was already closed')
+
+        i = self._position(name)
+        offset = self._offsets[i]
+        return pickle.loads(zlib.decompress(self._map[offset:offset + self._lengths[i]]))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return exc_type is None
+
+    def _position(self, name):
+        try:
+            return self._positions[name]
+        except KeyError:
+            raise KeyError("There is no item named '{}' in the index".format(name))
+
+
+class IndexEntry(object):
+    __slots__ = ('filename', 'header_offset')
+
+    def __init__(self, filename, header_offset):
+        self.filename = filename
+        self.header_offset = header_offset
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m javalink.index',
+        description='Write an index of the classes on a classpath for javalink_classpath.')
+    parser.add_argument('-o', '--output', required=True, help='the index file to write')
+    parser.add_argument('paths', nargs='+', metavar='path',
+                        help="a jar, a directory of classes, or a directory of jars ending in '*'")
+    args = parser.parse_args(argv)
+
+    try:
+        count = write_index(args.paths, args.output)
+    except ValueError as e:
+        parser.error(str(e))
+
+    sys.stdout.write('Indexed {} classes in {}\n'.format(count, args.output))
+
+
+if __name__ == '__main__':
+    main()
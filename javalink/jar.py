@@ -0,0 +1,241 @@
+import mmap
+import struct
+import zipfile
+import zlib
+
+from array import array
+from collections import namedtuple
+
+# end of central directory record
+_EOCD = struct.Struct('<4s4H2LH')
+_EOCD_SIGNATURE = b'PK\x05\x06'
+
+# zip64 end of central directory locator and record
+_ZIP64_LOCATOR = struct.Struct('<4sLQL')
+_ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+_ZIP64_EOCD = struct.Struct('<4sQ2H2L4Q')
+_ZIP64_EOCD_SIGNATURE = b'PK\x06\x06'
+_ZIP64_EXTRA = 0x0001
+
+# central directory file header
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+
+# local file header
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+# the largest possible comment after the end of central directory record
+_MAX_COMMENT = (1 << 16) - 1
+
+_FLAG_ENCRYPTED = 0x0001
+_FLAG_UTF8 = 0x0800
+
+# zip64 offsets and sizes need 64 bits; array('L') has only 32 on Windows
+# and 32-bit builds and array('Q') needs Python 3.3, so use a list if
+# neither holds them
+try:
+    _OFFSET_TYPECODE = array('Q').typecode
+except ValueError:
+    _OFFSET_TYPECODE = 'L' if array('L').itemsize >= 8 else None
+
+JarEntry = namedtuple('JarEntry', ('filename', 'header_offset', 'compress_type',
+                                   'compress_size', 'file_size'))
+
+
+def offset_array(values=()):
+    """Returns a compact mutable sequence of 64-bit file offsets or sizes."""
+    if _OFFSET_TYPECODE is None:
+        return list(values)
+    return array(_OFFSET_TYPECODE, values)
+
+
+class MappedJarFile(object):
+    """A read-only jar file that is mapped into memory.
+
+    The central directory is read once into a table of arrays indexed by
+    entry position. Reading an entry does not copy stored data and
+    inflates deflated data with a single call, instead of streaming it
+    through a file object as zipfile.ZipFile does.
+
+    Supports the subset of the ZipFile interface used by the ClassLoader.
+    Only stored and deflated entries can be read, and like ZipFile, the
+    CRC-32 of an entry is checked when it is read. Encrypted entries are
+    left out of the jar.
+
+    Args:
+        path: The path to a jar file.
+
+    Raises:
+        zipfile.BadZipfile: The file is not a valid jar.
+    """
+
+    def __init__(self, path):
+        self.filename = path
+
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # {entry name : position}
+        self._positions = {}
+        self._names = []
+        self._methods = array('B')
+        self._offsets = offset_array()
+        self._compressed_sizes = offset_array()
+        self._sizes = offset_array()
+        self._crcs = array('L')
+
+        try:
+            self._read_central_directory()
+        except (struct.error, OverflowError):
+            self.close()
+            raise zipfile.BadZipfile('Invalid central directory: {}'.format(path))
+        except zipfile.BadZipfile:
+            self.close()
+            raise
+
+    def namelist(self):
+        return list(self._names)
+
+    def getinfo(self, name):
+        i = self._position(name)
+        return JarEntry(name, self._offsets[i], self._methods[i],
+                        self._compressed_sizes[i], self._sizes[i])
+
+    def read(self, name):
+        """Returns the contents of an entry.
+
+        The contents of a stored entry are returned as a buffer that
+        shares memory with the mapped file. The contents of a deflated
+        entry are returned as a string.
+        """
+
+        if self._map is None:
+            raise RuntimeError('Attempt to read a jar that was already closed')
+
+        i = self._position(name)
+
+        offset = self._offsets[i]
+        header = _LOCAL_HEADER.unpack_from(self._map, offset)
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipfile('Bad local file header: {}'.format(name))
+
+        start = offset + _LOCAL_HEADER.size + header[9] + header[10]
+        data = buffer(self._map, start, self._compressed_sizes[i])
+
+        method = self._methods[i]
+        if method == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS, self._sizes[i])
+        elif method != zipfile.ZIP_STORED:
+            msg = 'Unsupported compression method {} for {}'
+            raise NotImplementedError(msg.format(method, name))
+
+        if len(data) != self._sizes[i] or zlib.crc32(data) & 0xFFFFFFFF != self._crcs[i]:
+            raise zipfile.BadZipfile('Bad CRC-32 for file {}'.format(name))
+        return data
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return exc_type is None
+
+    def _position(self, name):
+        try:
+            return self._positions[name]
+        except KeyError:
+            raise KeyError("There is no item named '{}' in the archive".format(name))
+
+    def _read_central_directory(self):
+        data = self._map
+
+        # the archive comment may contain the signature, so the record is
+        # the last one whose comment ends at the end of the file
+        start = max(0, len(data) - _EOCD.size - _MAX_COMMENT)
+        eocd = data.rfind(_EOCD_SIGNATURE, start)
+        while eocd >= 0:
+            if eocd + _EOCD.size <= len(data):
+                record = _EOCD.unpack_from(data, eocd)
+                if eocd + _EOCD.size + record[7] == len(data):
+                    break
+            eocd = data.rfind(_EOCD_SIGNATURE, start, eocd)
+        else:
+            raise zipfile.BadZipfile('End of central directory not found')
+
+        _, _, _, _, count, _, offset, _ = record
+
+        locator = eocd - _ZIP64_LOCATOR.size
+        if locator >= 0 and data[locator:locator + 4] == _ZIP64_LOCATOR_SIGNATURE:
+            _, _, zip64_eocd, _ = _ZIP64_LOCATOR.unpack_from(data, locator)
+            record = _ZIP64_EOCD.unpack_from(data, zip64_eocd)
+            if record[0] != _ZIP64_EOCD_SIGNATURE:
+                raise zipfile.BadZipfile('Bad zip64 end of central directory')
+            count, offset = record[7], record[9]
+
+        position = offset
+        for i in xrange(count):
+            header = _CENTRAL_HEADER.unpack_from(data, position)
+            if header[0] != _CENTRAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipfile('Bad central directory header')
+
+            flags, method = header[3], header[4]
+            crc, compressed_size, size = header[7:10]
+            name_length, extra_length, comment_length = header[10:13]
+            header_offset = header[16]
+
+            position += _CENTRAL_HEADER.size
+            name = data[position:position + name_length]
+            if flags & _FLAG_UTF8:
+                name = name.decode('utf-8')
+
+            extra = data[position + name_length:position + name_length + extra_length]
+            if 0xFFFFFFFF in (compressed_size, size, header_offset):
+                size, compressed_size, header_offset = _read_zip64_extra(
+                    extra, size, compressed_size, header_offset)
+
+            position += name_length + extra_length + comment_length
+
+            if flags & _FLAG_ENCRYPTED or name in self._positions:
+                # encrypted entries can't be read; the first copy of a
+                # duplicate entry is used
+                continue
+
+            self._positions[name] = len(self._names)
+            self._names.append(name)
+            self._methods.append(method)
+            self._offsets.append(header_offset)
+            self._compressed_sizes.append(compressed_size)
+            self._sizes.append(size)
+            self._crcs.append(crc)
+
+
+def _read_zip64_extra(extra, size, compressed_size, header_offset):
+    """Reads the 64-bit values of an entry from its extra field.
+
+    Only the values that are 0xFFFFFFFF in the central directory header
+    are present, in the order: size, compressed size, header offset.
+    """
+
+    position = 0
+    while position + 4 <= len(extra):
+        tag, length = struct.unpack_from('<2H', extra, position)
+        position += 4
+
+        if tag == _ZIP64_EXTRA:
+            values = []
+            for value in (size, compressed_size, header_offset):
+                if value == 0xFFFFFFFF:
+                    value = struct.unpack_from('<Q', extra, position)[0]
+                    position += 8
+                values.append(value)
+            return values
+
+        position += length
+
+    raise zipfile.BadZipfile('Missing zip64 extra field')
@@ -0,0 +1,272 @@
+import mmap
+import struct
+import zlib
+
+from collections import namedtuple
+
+MAGIC = 0xCAFEDADA
+MAJOR_VERSION = 1
+
+# the multiplier and default seed of the jimage string hash
+HASH_MULTIPLIER = 0x01000193
+
+_HEADER_FIELDS = 7
+
+# location attribute kinds
+ATTRIBUTE_END = 0
+ATTRIBUTE_MODULE = 1
+ATTRIBUTE_PARENT = 2
+ATTRIBUTE_BASE = 3
+ATTRIBUTE_EXTENSION = 4
+ATTRIBUTE_OFFSET = 5
+ATTRIBUTE_COMPRESSED = 6
+ATTRIBUTE_UNCOMPRESSED = 7
+_ATTRIBUTE_COUNT = 8
+
+COMPRESSED_MAGIC = 0xCAFEFAFA
+
+# modules that hold the directory structure of the image, not resources
+_DIRECTORY_MODULES = ('modules', 'packages')
+
+ImageEntry = namedtuple('ImageEntry', ('filename', 'header_offset', 'compress_size',
+                                       'file_size'))
+
+
+def hash_code(name, seed=HASH_MULTIPLIER):
+    """Computes the hash used by the jimage lookup table.
+
+    Args:
+        name: A UTF-8 encoded string.
+        seed: The hash seed.
+    """
+
+    for c in bytearray(name):
+        seed = ((seed * HASH_MULTIPLIER) ^ c) & 0xFFFFFFFF
+    return seed & 0x7FFFFFFF
+
+
+def is_jimage(path):
+    try:
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+    except IOError:
+        return False
+
+    return len(magic) == 4 and MAGIC in struct.unpack('<I', magic) + struct.unpack('>I', magic)
+
+
+class JImageFile(object):
+    """A read-only JDK runtime image (the lib/modules file of JDK 9+).
+
+    Resources are named as in a jar, without the module name, so an image
+    can be used like a jar on the classpath. Names are mapped to modules
+    by package when the image is opened; each read then finds the location
+    of a resource with the perfect hash table stored in the image.
+
+    Supports the subset of the ZipFile interface used by the ClassLoader.
+
+    Args:
+        path: The path to a jimage file.
+
+    Raises:
+        ValueError: The file is not a valid jimage.
+    """
+
+    def __init__(self, path):
+        self.filename = path
+
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._read_index()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def namelist(self):
+        return list(self._names)
+
+    def getinfo(self, name):
+        attributes = self._attributes(self._locate(name))
+        return ImageEntry(name, attributes[ATTRIBUTE_OFFSET], attributes[ATTRIBUTE_COMPRESSED],
+                          attributes[ATTRIBUTE_UNCOMPRESSED])
+
+    def read(self, name):
+        """Returns the contents of a resource.
+
+        Uncompressed resources are returned as a buffer that shares memory
+        with the mapped file.
+        """
+
+        if self._map is None:
+            raise RuntimeError('Attempt to read an image that was already closed')
+
+        attributes = self._attributes(self._locate(name))
+        start = self._index_size + attributes[ATTRIBUTE_OFFSET]
+
+        compressed_size = attributes[ATTRIBUTE_COMPRESSED]
+        if not compressed_size:
+            return buffer(self._map, start, attributes[ATTRIBUTE_UNCOMPRESSED])
+
+        return self._decompress(name, self._map[start:start + compressed_size])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return exc_type is None
+
+    def _read_index(self):
+        data = self._map
+
+        for order in ('<', '>'):
+            header = struct.unpack_from(order + 'I' * _HEADER_FIELDS, data, 0)
+            if header[0] == MAGIC:
+                break
+        else:
+            raise ValueError('Invalid jimage magic number')
+
+        self._order = order
+        _, version, _, _, length, locations_size, strings_size = header
+        if version >> 16 != MAJOR_VERSION:
+            raise ValueError('Unsupported jimage version {}'.format(version >> 16))
+
+        offset = 4 * _HEADER_FIELDS
+        self._length = length
+        self._redirect = struct.unpack_from('{}{}i'.format(order, length), data, offset)
+        offset += 4 * length
+        self._offsets = struct.unpack_from('{}{}I'.format(order, length), data, offset)
+        offset += 4 * length
+        self._locations_start = offset
+        self._strings_start = offset + locations_size
+        self._index_size = self._strings_start + strings_size
+
+        self._names = []
+        # {package path : [module]}
+        self._packages = {}
+
+        for location in self._offsets:
+            attributes = self._attributes(location)
+
+            module = self._string(attributes[ATTRIBUTE_MODULE])
+            if not module or module in _DIRECTORY_MODULES:
+                continue
+
+            parent = self._string(attributes[ATTRIBUTE_PARENT])
+            name = self._string(attributes[ATTRIBUTE_BASE])
+            extension = self._string(attributes[ATTRIBUTE_EXTENSION])
+            if parent:
+                name = parent + '/' + name
+            if extension:
+                name = name + '.' + extension
+
+            modules = self._packages.setdefault(parent + '/' if parent else '', [])
+            if module not in modules:
+                modules.append(module)
+            self._names.append(name)
+
+    def _locate(self, name):
+        """Returns the location offset of a resource.
+
+        Raises:
+            KeyError: The resource does not exist.
+        """
+
+        package = name[:name.rfind('/') + 1]
+        for module in self._packages.get(package, ()):
+            full_name = '/{}/{}'.format(module, name)
+            location = self._lookup(full_name)
+            if location is not None:
+                return location
+
+        raise KeyError("There is no item named '{}' in the image".format(name))
+
+    def _lookup(self, full_name):
+        if isinstance(full_name, unicode):
+            full_name = full_name.encode('utf-8')
+
+        if not self._length:
+            return None
+
+        index = hash_code(full_name) % self._length
+        value = self._redirect[index]
+        if value < 0:
+            index = -1 - value
+        elif value > 0:
+            index = hash_code(full_name, value) % self._length
+        else:
+            return None
+
+        location = self._offsets[index]
+        if self._full_name(location) != full_name:
+            return None
+        return location
+
+    def _attributes(self, location):
+        """Decodes the attributes of a location into a list indexed by kind."""
+        data = self._map
+        attributes = [0] * _ATTRIBUTE_COUNT
+
+        offset = self._locations_start + location
+        while True:
+            byte = ord(data[offset])
+            kind = byte >> 3
+            if kind == ATTRIBUTE_END:
+                return attributes
+            if kind >= _ATTRIBUTE_COUNT:
+                raise ValueError('Invalid jimage location attribute {}'.format(kind))
+
+            length = (byte & 0x7) + 1
+            value = 0
+            for c in bytearray(data[offset + 1:offset + 1 + length]):
+                value = (value << 8) | c
+            attributes[kind] = value
+            offset += 1 + length
+
+    def _string(self, offset):
+        start = self._strings_start + offset
+        end = self._map.find(b'\0', start)
+        return self._map[start:end]
+
+    def _full_name(self, location):
+        attributes = self._attributes(location)
+
+        module = self._string(attributes[ATTRIBUTE_MODULE])
+        parent = self._string(attributes[ATTRIBUTE_PARENT])
+        extension = self._string(attributes[ATTRIBUTE_EXTENSION])
+
+        name = []
+        if module:
+            name.append('/{}/'.format(module))
+        if parent:
+            name.append(parent + '/')
+        name.append(self._string(attributes[ATTRIBUTE_BASE]))
+        if extension:
+            name.append('.' + extension)
+        return ''.join(name)
+
+    def _decompress(self, name, data):
+        """Decompresses a resource compressed by jlink's zip plugin."""
+        header = struct.Struct(self._order + 'IQQIIB')
+
+        while len(data) >= header.size:
+            magic, size, uncompressed_size, decompressor, _, _ = header.unpack_from(data, 0)
+            if magic != COMPRESSED_MAGIC:
+                break
+
+            if self._string(decompressor) != 'zip':
+                msg = "Unsupported jimage compression '{}' for {}"
+                raise NotImplementedError(msg.format(self._string(decompressor), name))
+
+            data = zlib.decompress(data[header.size:header.size + size])
+            if len(data) != uncompressed_size:
+                raise ValueError('Invalid compressed resource: {}'.format(name))
+
+        return data
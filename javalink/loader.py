@@ -1,25 +1,38 @@
-import javatools
+import contextlib
+import hashlib
+import multiprocessing
 import os
+import re
+import threading
 import zipfile
 
 from itertools import chain as flatten
+from multiprocessing.pool import ThreadPool
 from javatools import ziputils
 
+from .cache import ClassCache
+from .classfile import scan_class
+from .index import ClassIndexFile, is_index
+from .jar import MappedJarFile
+from .jimage import JImageFile, is_jimage
 from .model import LinkableClass, Package, parse_name
+from .stats import Stats
 
 def extract_class(jar, name):
-    """Extracts a LinkableClass from a jar.
+    """Extracts the data for a LinkableClass from a jar.
 
     Args:
-        jar: An open ZipFile instance.
+        jar: An open MappedJarFile, ClassIndexFile, or ZipFile-like instance.
         name: A string containing the binary name of a class.
 
     Raises:
         KeyError: The class does not exist in the jar.
+        ValueError: The class file is invalid.
     """
 
-    with jar.open(name) as entry:
-        return LinkableClass(javatools.unpack_class(entry))
+    if isinstance(jar, ClassIndexFile):
+        return jar.read_class(name)
+    return scan_class(jar.read(name))
 
 
 def is_jar(path):
@@ -27,7 +40,7 @@ def is_jar(path):
 
 
 def expand_path(path):
-    if os.path.isdir(path) or is_jar(path):
+    if os.path.isdir(path) or is_jar(path) or is_jimage(path) or is_index(path):
         return [path]
     elif os.path.basename(path) == '*':
         path = os.path.dirname(path)
@@ -37,73 +50,495 @@ def expand_path(path):
         raise ValueError('Invalid classpath entry: {}'.format(path))
 
 
+def fingerprint(path):
+    """Computes a value that changes when a classpath resource changes.
+
+    Jars are identified by their size and modification time. Directories
+    are identified by the relative path, size, and modification time of
+    every file they contain.
+    """
+
+    if os.path.isdir(path):
+        digest = hashlib.sha1()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                filename = os.path.join(root, name)
+                stat = os.stat(filename)
+                digest.update('{}\0{}\0{}\n'.format(os.path.relpath(filename, path),
+                                                   stat.st_size, stat.st_mtime))
+        return digest.hexdigest()
+
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime)
+
+
 def open_resource(path):
     if os.path.isdir(path):
         return ExplodedZipFile(path)
     elif is_jar(path):
-        return zipfile.ZipFile(path, 'r')
+        return MappedJarFile(path)
+    elif is_jimage(path):
+        return JImageFile(path)
+    elif is_index(path):
+        return ClassIndexFile(path)
     else:
         raise ValueError('Invalid classpath entry: {}'.format(path))
 
 
+# the version of the format used to pickle a ClassLoader
+SERIAL_VERSION = 2
+
+# maximum number of threads that read prefetched classes
+MAX_PREFETCH_THREADS = 2
+
+# the number of classes read by a warm-up process at a time
+WARM_UP_CHUNK_SIZE = 256
+
+
+class Dependencies(object):
+    """The parts of the classpath that a document depends on.
+
+    Attributes:
+        packages: A set of the paths of packages that contain classes the
+            document found or that the document looked up by name.
+        missing: A set of class names the document looked up that did
+            not exist.
+    """
+
+    def __init__(self):
+        self.packages = set()
+        self.missing = set()
+
+    def update(self, other):
+        """Adds the dependencies of another Dependencies instance."""
+        self.packages.update(other.packages)
+        self.missing.update(other.missing)
+
+    def is_outdated(self, loader, changed_packages):
+        """Checks if a change to the classpath affects the recorded lookups.
+
+        Args:
+            loader: The ClassLoader for the changed classpath.
+            changed_packages: A set of the paths of packages that changed.
+        """
+
+        if not changed_packages:
+            return False
+        if not self.packages.isdisjoint(changed_packages):
+            return True
+
+        # a change can add a class the document failed to find
+        return any(loader.resolve(n) for n in self.missing)
+
+
 class ClassLoader(object):
-    def __init__(self, paths):
+    # set if the loader was unpickled from an incompatible format
+    stale = False
+
+    def __init__(self, paths, cache_dir=None, stats=None):
         expanded_paths = [expand_path(p) for p in paths]
         self.paths = list(flatten.from_iterable(expanded_paths))
-        self.resources = ResourceLoader(self.paths)
+        self.resources = ResourceLoader(self.paths, stats)
+
+        self.cache_dir = cache_dir
+        self.cache = ClassCache(cache_dir) if cache_dir else None
 
         # {Package : {class name : LinkableClass}}
         self.packages = {}
 
+        # {imports : Namespace}
+        self.namespaces = {}
+
+        # if set, the Dependencies that record lookups
+        self.dependencies = None
+
+        self._init_prefetch()
+
+    def _init_prefetch(self):
+        self._lock = threading.RLock()
+        self._pool = None
+        self._pid = os.getpid()
+
+    @property
+    def lock(self):
+        """Held while a class is read.
+
+        Prefetch threads and the main thread never read the same class or
+        open a resource at the same time.
+        """
+        if self._pid != os.getpid():
+            # threads and locks of a parent process can't be used by a child
+            self._init_prefetch()
+        return self._lock
+
     def load(self, name):
+        """Returns a LazyClass for a class or None if it does not exist.
+
+        The class file is not read until members of the class are needed.
+        """
         package, class_name = parse_name(name)
 
         try:
-            return self.packages[package][class_name]
+            clazz = self.packages[package][class_name]
+            self.stats.incr('class_lookup_hits')
         except KeyError:
-            clazz = self.find(name)
-            if clazz and (clazz.package != package or clazz.name != class_name):
-                msg = "Wanted class '{}', but '{}' was loaded"
-                raise ValueError(msg.format(name, clazz))
+            self.stats.incr('class_lookup_misses')
+            if self.exists(name):
+                clazz = LazyClass(self, name)
+            else:
+                clazz = None
 
             classes = self.packages.setdefault(package, {})
             classes[class_name] = clazz
-            return clazz
+
+        self._record(package, name, clazz is not None)
+        return clazz
+
+    def resolve(self, name):
+        """Finds the binary name of a class given its qualified name.
+
+        Nested classes may be separated from their enclosing class by
+        either '.' or '$'.
+
+        Returns:
+            The binary name of the class or None if it does not exist.
+        """
+        if self.exists(name):
+            binary_name = name
+        else:
+            binary_name = self.resources.names.resolve(name)
+
+        package, _ = parse_name(binary_name or name)
+        self._record(package, name, binary_name is not None)
+        return binary_name
+
+    @contextlib.contextmanager
+    def recording(self, dependencies):
+        """Records the lookups made in a block in a Dependencies instance."""
+        previous = self.dependencies
+        self.dependencies = dependencies
+        try:
+            yield dependencies
+        finally:
+            self.dependencies = previous
+
+    def _record(self, package, name, found):
+        if self.dependencies is not None:
+            if found:
+                self.dependencies.packages.add(package.path)
+            else:
+                self.dependencies.missing.add(name)
+
+    @property
+    def stats(self):
+        return self.resources.stats
+
+    @stats.setter
+    def stats(self, stats):
+        self.resources.stats = stats
+
+    def preload(self, classes):
+        """Reads a group of classes in the order they appear on the classpath.
+
+        Classes are sorted by resource and by position in the resource, so
+        that each jar is read from start to end once.
+
+        Args:
+            classes: An iterable of classes returned by load.
+        """
+
+        def position(clazz):
+            path = clazz.package.get_member_path(clazz.name)
+            return self.resources.position(path)
+
+        pending = set(c for c in classes if not c.parsed)
+        for clazz in sorted(pending, key=position):
+            clazz.clazz
+
+    def prefetch(self, names):
+        """Reads a group of classes in the background.
+
+        Classes are looked up immediately and read on a small thread pool,
+        so later calls to load usually return classes that were already
+        read. Lookups made by prefetch are not recorded as dependencies.
+
+        Args:
+            names: An iterable of binary class names.
+        """
+
+        with self.recording(None):
+            classes = [self.load(n) for n in names]
+
+        pending = [c for c in classes if c and not c.parsed]
+        if not pending:
+            return
+
+        if self._pool is None or self._pid != os.getpid():
+            self._init_prefetch()
+            self._pool = ThreadPool(MAX_PREFETCH_THREADS)
+
+        self.stats.incr('prefetched_classes', len(pending))
+        for clazz in pending:
+            self._pool.apply_async(_prefetch_class, (clazz,))
+
+    def warm_up(self, packages=(), paths=(), processes=None):
+        """Reads every class in a group of packages and resources at once.
+
+        Classes are read in chunks on a pool of processes. Classes that
+        were already read or that are in the cache are skipped.
+
+        Args:
+            packages: An iterable of package names. Classes in subpackages
+                are not included.
+            paths: An iterable of resource paths on the classpath.
+            processes: The number of processes to use (optional). Defaults
+                to the number of CPUs.
+
+        Returns:
+            The number of classes that were read.
+        """
+
+        package_paths = set(Package(p.split('.')).path for p in packages)
+        paths = set(paths)
+        positions = set(i for i, p in enumerate(self.paths) if p in paths)
+
+        # {resource position : [entry path]}
+        pending = {}
+        for entry, i in self.resources.entries.iteritems():
+            if i not in positions and entry[:entry.rfind('/') + 1] not in package_paths:
+                continue
+
+            package, name = parse_name(entry[:-len('.class')].replace('/', '.'))
+            clazz = self.packages.get(package, {}).get(name)
+            if clazz and clazz.parsed:
+                continue
+
+            data = None
+            if self._is_cached(i):
+                data = self.cache.get(self.paths[i], entry)
+            if data is not None:
+                self._add_class(entry, data)
+            else:
+                pending.setdefault(i, []).append(entry)
+
+        tasks = []
+        for i, entries in sorted(pending.iteritems()):
+            entries.sort(key=self.resources.position)
+            for start in xrange(0, len(entries), WARM_UP_CHUNK_SIZE):
+                tasks.append((i, self.paths[i], entries[start:start + WARM_UP_CHUNK_SIZE]))
+
+        if not tasks:
+            return 0
+
+        count = 0
+        pool = multiprocessing.Pool(processes)
+        try:
+            for i, classes in pool.imap_unordered(_read_classes, tasks):
+                for entry, data in classes:
+                    self._add_class(entry, data)
+                    if self._is_cached(i):
+                        self.cache.put(self.paths[i], entry, data)
+                count += len(classes)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.stats.incr('classes_parsed', count)
+        return count
+
+    def _is_cached(self, i):
+        return self.cache is not None and not self.resources.is_index(i)
+
+    def _add_class(self, entry, data):
+        clazz = LazyClass(self, entry[:-len('.class')].replace('/', '.'))
+        clazz._data = data
+        self.packages.setdefault(clazz.package, {})[clazz.name] = clazz
+
+    def exists(self, name):
+        """Checks if a class exists without reading the class file."""
+        package, class_name = parse_name(name)
+        return self.resources.locate(package.get_member_path(class_name)) is not None
 
     def find(self, name):
         package, class_name = parse_name(name)
         path = package.get_member_path(class_name)
 
-        for jar in self.resources:
-            try:
-                return extract_class(jar, path)
-            except KeyError:
-                pass
+        i = self.resources.locate(path)
+        if i is None:
+            return None
 
-        return None
+        return LinkableClass(self._read_class(i, path))
+
+    def _read_class(self, i, entry):
+        if self.resources.is_index(i):
+            # index files store classes that were already parsed
+            self.stats.incr('classes_indexed')
+            return extract_class(self.resources.open(i), entry)
+
+        jar_path = self.resources.paths[i]
+        if self.cache:
+            data = self.cache.get(jar_path, entry)
+            if data is not None:
+                self.stats.incr('class_cache_hits')
+                return data
+            self.stats.incr('class_cache_misses')
+
+        resource = self.resources.open(i)
+        with self.stats.timer('parse'):
+            data = extract_class(resource, entry)
+        self.stats.incr('classes_parsed')
+
+        if self.cache:
+            self.cache.put(jar_path, entry, data)
+
+        return data
+
+    def namespace(self, imports):
+        """Returns the Namespace for a sequence of imports.
+
+        Namespaces are shared by all callers with the same imports.
+
+        Args:
+            imports: A sequence of (package name, name) tuples. The name is
+                either a class name or '*'.
+        """
+        imports = tuple(imports)
+        try:
+            return self.namespaces[imports]
+        except KeyError:
+            namespace = Namespace(self, imports)
+            self.namespaces[imports] = namespace
+            return namespace
+
+    def package_classes(self, name):
+        """Returns the names of the top-level classes in a package."""
+        return self.resources.packages.get(name.replace('.', '/') + '/', ())
 
     # TODO take either a Package or a string name
     def find_package(self, name):
         package = Package(name.split('.'))
+        if self.dependencies is not None:
+            self.dependencies.packages.add(package.path)
 
-        if package in self.packages:
+        if self.resources.has_package(package.path):
             return package
 
-        for jar in self.resources:
-            try:
-                jar.getinfo(package.path)
-            except KeyError:
-                pass
-            else:
-                # TODO avoid changing state in find method
-                self.packages[package] = {}
-                return package
-
         return None
 
+    def merge(self, other):
+        """Adds the classes and packages loaded by another ClassLoader.
+
+        Classes that were parsed by the other loader replace classes that
+        were only found by this loader. If a cache is configured, the data
+        for newly parsed classes is added to it.
+
+        Args:
+            other: A ClassLoader with the same classpath.
+        """
+
+        if self.resources.fingerprints is None:
+            self.resources.fingerprints = other.resources.fingerprints
+
+        for package, other_classes in other.packages.iteritems():
+            classes = self.packages.setdefault(package, {})
+            for name, other_clazz in other_classes.iteritems():
+                clazz = classes.get(name)
+                replace = clazz and other_clazz and other_clazz.parsed and not clazz.parsed
+                if name in classes and not replace:
+                    continue
+
+                clazz = other_clazz.copy(self) if other_clazz else None
+                classes[name] = clazz
+
+                if clazz and clazz.parsed and self.cache:
+                    path = package.get_member_path(name)
+                    i = self.resources.locate(path)
+                    if i is not None and not self.resources.is_index(i):
+                        self.cache.put(self.resources.paths[i], path, clazz.data)
+
+    def refresh(self, paths, cache_dir=None):
+        """Updates the classpath and discards classes that may have changed.
+
+        Resources that were added, removed, modified, or moved relative to
+        each other since the classpath was last indexed are found by
+        comparing fingerprints. Loaded classes in any package contained by
+        one of these resources are discarded.
+
+        Args:
+            paths: The new classpath.
+            cache_dir: The new cache directory (optional).
+
+        Returns:
+            A set of the paths of the packages that may have changed.
+        """
+
+        paths = list(flatten.from_iterable(expand_path(p) for p in paths))
+        old = self.resources.fingerprints
+
+        if cache_dir != self.cache_dir:
+            if self.cache:
+                self.cache.flush()
+            self.cache_dir = cache_dir
+            self.cache = ClassCache(cache_dir) if cache_dir else None
+
+        if old is None:
+            # nothing was loaded from a classpath that was never indexed
+            self.resources.close()
+            self.paths = paths
+            self.resources = ResourceLoader(paths, self.stats)
+            self.packages = {}
+            self.namespaces = {}
+            return set()
+
+        changed = set(p for p in self.paths if p not in paths)
+        for path in paths:
+            previous = old.get(path)
+            if not previous or previous[0] != fingerprint(path):
+                changed.add(path)
+
+        # moving a resource changes which copy of a duplicate class is used
+        kept = [p for p in paths if p not in changed]
+        if kept != [p for p in self.paths if p in kept]:
+            changed.update(kept)
+
+        if not changed:
+            return set()
+
+        self.resources.close()
+        self.paths = paths
+        self.resources = ResourceLoader(paths, self.stats)
+        self.namespaces = {}
+        if self.cache:
+            # drop the in-memory copies of caches for changed jars
+            self.cache.flush()
+            self.cache = ClassCache(self.cache_dir)
+
+        # index the new classpath to find the packages in changed resources
+        self.resources.build_index()
+        new = self.resources.fingerprints
+
+        changed_packages = set()
+        for path in changed:
+            for fingerprints in (old, new):
+                if path in fingerprints:
+                    changed_packages.update(fingerprints[path][1])
+
+        for package in list(self.packages):
+            if package.path in changed_packages:
+                del self.packages[package]
+
+        return changed_packages
+
     def close(self):
-        for resource in self.resources:
-            resource.close()
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.terminate()
+            self._pool.join()
+        self._pool = None
+
+        self.resources.close()
+        if self.cache:
+            self.cache.flush()
 
     def __enter__(self):
         return self
@@ -113,28 +548,423 @@ class ClassLoader(object):
         return exc_type is None
 
     def __getstate__(self):
-        obj = self.__dict__.copy()
-        del obj['resources']
-        return obj
+        # Store classes as tuples of strings, sharing equal values, instead
+        # of object graphs. This keeps the pickled environment small and
+        # fast to load.
+        table = {}
+
+        classes = []
+        for package, members in self.packages.iteritems():
+            package_name = _intern(table, package.name)
+            for name, clazz in members.iteritems():
+                if clazz is None:
+                    state = None
+                elif clazz.parsed:
+                    state = _intern_class_data(table, clazz.data)
+                else:
+                    state = True
+
+                classes.append((package_name, _intern(table, name), state))
+
+        return (SERIAL_VERSION, self.paths, self.cache_dir, self.resources.fingerprints,
+                tuple(classes))
+
+    def __setstate__(self, state):
+        if not isinstance(state, tuple) or state[0] != SERIAL_VERSION:
+            # written by an incompatible version of javalink
+            self.__init__([])
+            self.stale = True
+            return
+
+        _, paths, cache_dir, fingerprints, classes = state
+
+        self.paths = paths
+        self.resources = ResourceLoader(self.paths, fingerprints=fingerprints)
+        self.cache_dir = cache_dir
+        self.cache = ClassCache(self.cache_dir) if self.cache_dir else None
+        self.namespaces = {}
+        self.dependencies = None
+        self._init_prefetch()
+
+        self.packages = {}
+        for package_name, name, state in classes:
+            package = Package(package_name.split('.') if package_name else [])
+            if state is None:
+                clazz = None
+            else:
+                clazz = LazyClass(self, '{}.{}'.format(package_name, name))
+                if state is not True:
+                    clazz._data = state
+
+            self.packages.setdefault(package, {})[name] = clazz
+
+
+# the resources opened by a warm-up process, which reads several chunks
+# of the same resource; {resource path : resource}
+_worker_resources = {}
+
+# errors from reading an invalid or unreadable class
+_CLASS_ERRORS = (KeyError, ValueError, NotImplementedError, EnvironmentError,
+                 zipfile.BadZipfile)
+
+
+def _read_classes(task):
+    """Reads a chunk of classes from a resource in a warm-up process.
+
+    Each process opens a resource once and keeps it open for the chunks
+    that follow. Invalid classes are skipped; the error is raised again if
+    the class is used.
+    """
+
+    i, path, entries = task
+
+    resource = _worker_resources.get(path)
+    if resource is None:
+        try:
+            resource = open_resource(path)
+        except _CLASS_ERRORS:
+            return i, []
+        _worker_resources[path] = resource
+
+    classes = []
+    for entry in entries:
+        try:
+            classes.append((entry, extract_class(resource, entry)))
+        except _CLASS_ERRORS:
+            pass
+
+    return i, classes
+
+
+def _prefetch_class(clazz):
+    try:
+        clazz.clazz
+    except _CLASS_ERRORS:
+        # the error is raised again when the class is used
+        pass
+
+
+def _intern(table, value):
+    return table.setdefault(value, value)
+
 
-    def __setstate__(self, obj):
-        self.__dict__.update(obj)
-        self.resources = ResourceLoader(self.paths)
+def _intern_class_data(table, data):
+    this, fields, methods = data
+
+    interned_methods = []
+    for name, args, varargs in methods:
+        args = tuple(_intern(table, tuple(_intern(table, t) for t in arg)) for arg in args)
+        method = (_intern(table, name), _intern(table, args), varargs)
+        interned_methods.append(_intern(table, method))
+
+    fields = _intern(table, tuple(_intern(table, f) for f in fields))
+    return (_intern(table, this), fields, tuple(interned_methods))
+
+
+class Namespace(object):
+    """Maps the simple names of imported classes to qualified names.
+
+    Single-type imports take precedence over on-demand ('*') imports. If
+    more than one on-demand import provides a name, the name is ambiguous.
+
+    Attributes:
+        conflicts: A list of (name, qualified name, conflicting qualified
+            name) tuples for single-type imports with the same name as an
+            earlier import. The earlier import is used.
+    """
+
+    def __init__(self, loader, imports):
+        # {simple name : [qualified name]}
+        self.names = {}
+        self.conflicts = []
+
+        self.loader = loader
+        # the paths of the packages imported on demand
+        self.packages = frozenset(Package(p.split('.')).path for p, n in imports if n == '*')
+
+        # {simple name : [qualified name]}
+        on_demand = {}
+
+        for package, name in imports:
+            if name == '*':
+                for simple in loader.package_classes(package):
+                    qualified = '{}.{}'.format(package, simple)
+                    candidates = on_demand.setdefault(simple, [])
+                    if qualified not in candidates:
+                        candidates.append(qualified)
+            else:
+                qualified = '{}.{}'.format(package, name)
+                first = self.names.setdefault(name, [qualified])[0]
+                if first != qualified:
+                    self.conflicts.append((name, first, qualified))
+
+        for simple, candidates in on_demand.iteritems():
+            self.names.setdefault(simple, candidates)
+
+    def lookup(self, name):
+        """Returns the list of qualified names for a simple name."""
+        if self.loader.dependencies is not None:
+            # any of the packages could provide the name
+            self.loader.dependencies.packages.update(self.packages)
+        return self.names.get(name, ())
+
+
+class LazyClass(object):
+    """A proxy for a LinkableClass that reads the class file on demand.
+
+    The name of a class is known before the class file is read, so only
+    access to the members of the class requires reading it.
+    """
+
+    __slots__ = ('package', 'name', 'full_name', '_loader', '_clazz', '_data')
+
+    def __init__(self, loader, name):
+        self.package, self.name = parse_name(name)
+        self.full_name = '{}.{}'.format(self.package, self.name)
+
+        self._loader = loader
+        self._clazz = None
+        self._data = None
+
+    @property
+    def parsed(self):
+        return self._clazz is not None or self._data is not None
+
+    def copy(self, loader):
+        """Returns a copy of this class that belongs to another loader."""
+        clazz = LazyClass(loader, self.full_name)
+        clazz._clazz = self._clazz
+        clazz._data = self._data
+        return clazz
+
+    @property
+    def clazz(self):
+        if self._clazz is None and self._data is not None:
+            self._clazz = LinkableClass(self._data)
+        elif self._clazz is None:
+            with self._loader.lock:
+                # another thread may have read the class while this one waited
+                if self._clazz is None:
+                    clazz = self._loader.find(self.full_name)
+                    if not clazz or clazz.full_name != self.full_name:
+                        msg = "Wanted class '{}', but '{}' was loaded"
+                        raise ValueError(msg.format(self.full_name, clazz))
+
+                    self._clazz = clazz
+
+        return self._clazz
+
+    @property
+    def data(self):
+        if self._data is not None:
+            return self._data
+        return self.clazz.data
+
+    @property
+    def fields(self):
+        return self.clazz.fields
+
+    @property
+    def methods(self):
+        return self.clazz.methods
+
+    def get_member(self, member):
+        return self.clazz.get_member(member)
+
+    def __str__(self):
+        return self.full_name
 
 
 class ResourceLoader(object):
-    def __init__(self, paths):
+    """Opens classpath resources and indexes their contents.
+
+    The index maps the path of every class file on the classpath to the
+    position of the first resource that contains it, so lookups do not
+    need to probe each resource in turn. The index is built from the
+    central directory of each jar (or the listing of each directory) the
+    first time it is needed.
+    """
+
+    def __init__(self, paths, stats=None, fingerprints=None):
         self.paths = list(paths)
-        self.resources = []
+        self.resources = [None] * len(self.paths)
+        self.pid = os.getpid()
+        self.stats = stats or Stats()
+
+        # {resource path : (fingerprint, frozenset of package paths)} as of
+        # the last time the index was built
+        self.fingerprints = fingerprints
+
+        # {entry path : resource position}
+        self._entries = None
+        # {package path : set of top-level class names}
+        self._packages = None
+        self._names = None
+        # the positions of index files
+        self._indexes = None
 
     def __iter__(self):
+        for i in range(len(self.paths)):
+            yield self.open(i)
+
+    def open(self, i):
+        if self.pid != os.getpid():
+            # resources opened by a parent process share file positions with
+            # the parent, so child processes (e.g. parallel reads) must open
+            # their own copies
+            self.resources = [None] * len(self.paths)
+            self.pid = os.getpid()
+
+        resource = self.resources[i]
+        if resource is None:
+            resource = open_resource(self.paths[i])
+            self.stats.incr('resources_opened')
+            self.resources[i] = resource
+        return resource
+
+    def locate(self, entry):
+        """Returns the position of the first resource containing an entry.
+
+        Returns None if no resource contains the entry.
+        """
+        return self.entries.get(entry)
+
+    def position(self, entry):
+        """Returns a key that sorts entries in the order they are stored.
+
+        Entries that do not exist sort last.
+        """
+        i = self.locate(entry)
+        if i is None:
+            return (len(self.paths), 0)
+
+        info = self.open(i).getinfo(entry)
+        return (i, getattr(info, 'header_offset', 0))
+
+    def find(self, entry):
+        """Returns the first resource containing an entry or None."""
+        i = self.locate(entry)
+        if i is None:
+            return None
+        return self.open(i)
+
+    def has_package(self, path):
+        return path in self.packages
+
+    def is_index(self, i):
+        """Checks if the resource at a position is a ClassIndexFile."""
+        if self._indexes is None:
+            self.build_index()
+        return i in self._indexes
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self.build_index()
+        return self._entries
+
+    @property
+    def packages(self):
+        if self._packages is None:
+            self.build_index()
+        return self._packages
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = NameTrie(self.entries)
+        return self._names
+
+    def build_index(self):
+        entries = {}
+        packages = {}
+        fingerprints = {}
+        indexes = set()
+
+        with self.stats.timer('index'):
+            for i, resource in enumerate(self):
+                value = fingerprint(self.paths[i])
+                if isinstance(resource, ClassIndexFile):
+                    indexes.add(i)
+
+                resource_packages = set()
+
+                for entry in resource.namelist():
+                    if not entry.endswith('.class'):
+                        continue
+
+                    # earlier resources take precedence
+                    entries.setdefault(entry, i)
+
+                    package, _, name = entry[:-len('.class')].rpartition('/')
+                    resource_packages.add(package + '/')
+                    classes = packages.setdefault(package + '/', set())
+                    if '$' not in name:
+                        classes.add(name)
+
+                fingerprints[self.paths[i]] = (value, frozenset(resource_packages))
+
+        self._entries = entries
+        self._packages = packages
+        self._indexes = indexes
+        self.fingerprints = fingerprints
+
+    def close(self):
         for resource in self.resources:
-            yield resource
+            if resource is not None:
+                resource.close()
+        self.resources = [None] * len(self.paths)
+
+
+class NameTrie(object):
+    """Maps the qualified names of classes to their binary names.
+
+    Each node is a dict from a name segment to a child node. The node for
+    a class also maps None to the binary name of the class. Packages and
+    nested classes use the same structure, so a dotted name is resolved
+    with a single walk from the root.
+    """
 
-        while len(self.paths) > 0:
-            resource = open_resource(self.paths.pop(0))
-            self.resources.append(resource)
-            yield resource
+    def __init__(self, entries=()):
+        self.root = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        """Adds a class given the path of its class file."""
+        path = entry[:-len('.class')]
+        package, _, name = path.rpartition('/')
+
+        segments = package.split('/') if package else []
+        nested = name.split('$')
+        if any(not n or n[0].isdigit() for n in nested):
+            # anonymous and local classes can't be referenced by name
+            return
+
+        node = self.root
+        for segment in segments + nested:
+            node = node.setdefault(segment, {})
+
+        if len(nested) == 1:
+            # a class in a package named like a class ('a/B/C.class') wins
+            # over a nested class with the same qualified name ('a/B$C.class')
+            node[None] = path.replace('/', '.')
+        else:
+            node.setdefault(None, path.replace('/', '.'))
+
+    def resolve(self, name):
+        """Returns the binary name of a class or None.
+
+        Nested classes may be separated by either '.' or '$', or a mix of
+        both, as in 'a.Outer$Inner.Deep'.
+        """
+        node = self.root
+        for segment in re.split(r'[.$]', name):
+            node = node.get(segment)
+            if node is None:
+                return None
+
+        return node.get(None)
 
 
 class ExplodedZipFile(ziputils.ExplodedZipFile):
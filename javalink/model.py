@@ -1,5 +1,6 @@
 import re
 
+
 _PRIMITIVE_TYPES = {
     'B': 'byte',
     'C': 'char',
@@ -13,10 +14,27 @@ _PRIMITIVE_TYPES = {
 
 
 class Package(object):
-    def __init__(self, parts):
-        self.parts = tuple(parts)
-        self.name = '.'.join(self.parts)
-        self.path = '/'.join(self.parts) + '/'
+    """A Java package.
+
+    There is only one instance for each package, so packages can be used
+    as dictionary keys and shared by every class they contain.
+    """
+
+    __slots__ = ('parts', 'name', 'path')
+
+    # {parts : Package}
+    _instances = {}
+
+    def __new__(cls, parts):
+        parts = tuple(parts)
+        try:
+            return cls._instances[parts]
+        except KeyError:
+            package = super(Package, cls).__new__(cls)
+            package.parts = parts
+            package.name = '.'.join(parts)
+            package.path = '/'.join(parts) + '/'
+            return cls._instances.setdefault(parts, package)
 
     def get_member_path(self, member):
         return self.path + member + '.class'
@@ -30,6 +48,9 @@ class Package(object):
     def __hash__(self):
         return hash(self.parts)
 
+    def __reduce__(self):
+        return (Package, (self.parts,))
+
     def __str__(self):
         return self.name
 
@@ -40,46 +61,99 @@ def parse_name(name, separator='.'):
 
 
 class LinkableClass(object):
-    def __init__(self, class_info):
-        self.package, self.name = parse_name(class_info.get_this(), '/')
+    __slots__ = ('data', 'package', 'name', 'full_name', 'fields', 'methods', '_members')
+
+    def __init__(self, data):
+        this, fields, methods = data
+        self.data = data
+
+        self.package, self.name = parse_name(this, '/')
         self.full_name = '{}.{}'.format(self.package, self.name)
 
-        self.fields = tuple(LinkableField(f) for f in class_info.fields)
+        self.fields = tuple(LinkableField(f) for f in fields)
+        self.methods = tuple(LinkableMethod(self.name, m) for m in methods)
 
-        methods = []
-        for m in filter(is_linkable_method, class_info.methods):
-            methods.append(LinkableMethod(self.name, m))
-        self.methods = tuple(methods)
+        self._members = None
 
     def get_member(self, member):
-        field = next((f for f in self.fields if member == f.name), None)
+        if self._members is None:
+            self._members = MemberIndex(self)
+
+        return self._members.get(member)
+
+    def __str__(self):
+        return '{}.{}'.format(self.package.name, self.name)
+
+
+class MemberIndex(object):
+    """Finds the fields and methods of a class by name.
+
+    Methods are grouped by name and then by number of arguments. For each
+    method, the type names that match each argument are computed once, so
+    resolving an overload only considers methods with the right arity.
+    """
+
+    __slots__ = ('fields', 'methods', 'overloads')
+
+    def __init__(self, clazz):
+        # {field name : LinkableField}
+        self.fields = {}
+        for f in clazz.fields:
+            self.fields.setdefault(f.name, f)
+
+        # {method name : [LinkableMethod]}, in class file order
+        self.methods = {}
+        # {(method name, arity) : [(LinkableMethod, (suffixes, ...))]}
+        self.overloads = {}
+
+        for m in clazz.methods:
+            self.methods.setdefault(m.name, []).append(m)
+
+            suffixes = tuple(a.suffixes() for a in m.args)
+            key = (m.name, len(m.args))
+            self.overloads.setdefault(key, []).append((m, suffixes))
+
+    def get(self, member):
+        field = self.fields.get(member)
         if field:
             return field
 
-        match = re.match(r'^(.+?)(?:\((.*)\))?$', member)
-        if match:
-            name, args = match.group(1, 2)
-            for method in [m for m in self.methods if name == m.name]:
-                if args is None:
-                    return method
+        name, args = _split_member(member)
+        if args is None:
+            methods = self.methods.get(name)
+            return methods[0] if methods else None
 
-                if args.strip():
-                    arglist = [a.strip() for a in args.split(',')]
-                else:
-                    arglist = []
+        if args.strip():
+            arglist = [a.strip().replace('...', '[]') for a in args.split(',')]
+        else:
+            arglist = []
 
-                if method.has_args(arglist):
-                    return method
+        for method, suffixes in self.overloads.get((name, len(arglist)), ()):
+            if all(a in s for a, s in zip(arglist, suffixes)):
+                return method
 
         return None
 
-    def __str__(self):
-        return '{}.{}'.format(self.package.name, self.name)
+
+def _split_member(member):
+    """Splits a member reference into a name and an argument string.
+
+    The argument string is None if the reference has no parentheses.
+    """
+
+    if member.endswith(')'):
+        name, paren, args = member[:-1].partition('(')
+        if paren and name:
+            return name, args
+
+    return member, None
 
 
 class LinkableField(object):
-    def __init__(self, field):
-        self.name = field.get_name()
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
 
     def get_url_fragment(self):
         return self.name
@@ -89,30 +163,18 @@ class LinkableField(object):
 
 
 class LinkableMethod(object):
-    def __init__(self, class_name, method):
-        name = method.get_name()
+    __slots__ = ('name', 'args')
+
+    def __init__(self, class_name, data):
+        name, args, varargs = data
         if name == '<init>':
             self.name = class_name.split('$')[-1]
         else:
             self.name = name
 
-        args = method.pretty_arg_types()
-        arg_signatures = get_arg_signatures(method.get_signature())
-
-        # 'None' extension behavior of map is important
-        self.args = map(Argument, args, arg_signatures)
-        if self.args:
-            self.args[-1].vararg = method.is_varargs()
-
-    def has_args(self, args):
-        if len(args) != len(self.args):
-            return False
-
-        for arg, a in zip(args, self.args):
-            if not a.endswith(arg):
-                return False
-
-        return True
+        last = len(args) - 1
+        self.args = tuple(Argument.get(arg, sig, varargs and i == last)
+                          for i, (arg, sig) in enumerate(args))
 
     def get_url_fragment(self):
         args = ', '.join([str(a) for a in self.args])
@@ -123,29 +185,48 @@ class LinkableMethod(object):
 
 
 class Argument(object):
-    def __init__(self, arg, sig=None, vararg=False):
-        self.parts = arg.split('.')
-        if sig:
-            self.sig_parts = sig.split('.')
-        else:
-            self.sig_parts = []
-        self.vararg = vararg
+    """The type of a method argument.
 
-    def endswith(self, arg):
-        # standardize varargs to array syntax
-        arg_parts = arg.replace('...', '[]').split('.')
+    Arguments are immutable. Use Argument.get to share instances between
+    all methods with an argument of the same type.
+    """
 
-        if len(arg_parts) > len(self.parts):
-            return False
+    __slots__ = ('parts', 'sig_parts', 'vararg')
 
-        endswith = self.parts[-len(arg_parts):] == arg_parts
-        if not endswith:
-            endswith = self.parts[-len(arg_parts):] == arg_parts
+    # {(arg, sig, vararg) : Argument}
+    _instances = {}
 
-        if not endswith and self.sig_parts:
-            endswith = self.sig_parts[-len(arg_parts):] == arg_parts
+    # {type name : tuple of name parts}
+    _parts = {}
 
-        return endswith
+    def __init__(self, arg, sig=None, vararg=False):
+        self.parts = _split_type(arg)
+        if sig:
+            self.sig_parts = _split_type(sig)
+        else:
+            self.sig_parts = ()
+        self.vararg = vararg
+
+    @classmethod
+    def get(cls, arg, sig=None, vararg=False):
+        key = (arg, sig, vararg)
+        try:
+            return cls._instances[key]
+        except KeyError:
+            return cls._instances.setdefault(key, cls(arg, sig, vararg))
+
+    def suffixes(self):
+        """Returns the set of type names in references that match this argument.
+
+        A reference matches with any trailing part of the qualified name of
+        the type, either as erased or as generic, up to the length of the
+        erased name.
+        """
+        suffixes = set()
+        for parts in (self.parts, self.sig_parts[-len(self.parts):]):
+            for i in range(len(parts)):
+                suffixes.add('.'.join(parts[i:]))
+        return frozenset(suffixes)
 
     def __str__(self):
         arg_str = '.'.join(self.sig_parts)
@@ -159,63 +240,179 @@ class Argument(object):
             return arg_str
 
 
+def _split_type(name):
+    try:
+        return Argument._parts[name]
+    except KeyError:
+        return Argument._parts.setdefault(name, tuple(name.split('.')))
+
+
+def get_class_data(class_info):
+    """Extracts the linkable parts of a class.
+
+    The result contains only strings, tuples, and booleans, so it can be
+    stored and used to create a LinkableClass without the class file.
+
+    Args:
+        class_info: A javatools JavaClassInfo instance.
+
+    Returns:
+        A tuple of (binary name, field names, methods). Each method is a
+        tuple of (name, arguments, varargs) and each argument is a tuple
+        of (type, generic type or None).
+    """
+
+    fields = tuple(f.get_name() for f in class_info.fields)
+
+    methods = []
+    for m in filter(is_linkable_method, class_info.methods):
+        args = m.pretty_arg_types()
+        arg_signatures = get_arg_signatures(m.get_signature())
+
+        # 'None' extension behavior of map is important
+        args = tuple(map(lambda a, s: (a, s), args, arg_signatures))
+        methods.append((m.get_name(), args, bool(m.is_varargs())))
+
+    return (class_info.get_this(), fields, tuple(methods))
+
+
 def is_linkable_method(method_info):
     return not (method_info.is_bridge() or
                 method_info.is_synthetic() or
                 method_info.get_name() == '<clinit>')
 
 
+# the maximum number of decoded descriptors and signatures to remember
+MAX_DECODED_TYPES = 1 << 14
+
+# {descriptor, signature, or (descriptor, signature) : decoded arguments}
+_decoded = {}
+
+_CLASS_NAME_END = re.compile(r'[;<.]')
+_TYPE_ARGUMENT_BRACKET = re.compile(r'[<>]')
+
+
+def _memoize(key, decode, *args):
+    try:
+        return _decoded[key]
+    except KeyError:
+        value = decode(*args)
+        if len(_decoded) >= MAX_DECODED_TYPES:
+            _decoded.clear()
+        _decoded[key] = value
+        return value
+
+
+def get_method_args(descriptor, sig=None):
+    """Returns the arguments of a method as (type, generic type) tuples.
+
+    The generic type is None for arguments that have no type in the
+    signature, or for all arguments if there is no signature.
+    """
+    return _memoize((descriptor, sig), _decode_method_args, descriptor, sig)
+
+
+def _decode_method_args(descriptor, sig):
+    args = get_arg_types(descriptor)
+    if sig is None:
+        return tuple((a, None) for a in args)
+
+    # 'None' extension behavior of map is important
+    return tuple(map(lambda a, s: (a, s), args, get_arg_signatures(sig)))
+
+
+def get_arg_types(descriptor):
+    """Returns the argument types of a method descriptor.
+
+    Types are formatted as in javatools' pretty_arg_types: class names are
+    separated by '.' and arrays end in '[]'.
+    """
+    return _memoize(descriptor, _decode_args, descriptor)
+
+
 def get_arg_signatures(sig):
+    """Returns the argument types of a generic method signature.
+
+    Type arguments are erased, type variables are returned by name, and
+    inner classes of generic classes are separated by '$'.
+    """
     if sig is None:
-        return []
+        return ()
+    return _memoize(sig, _decode_args, sig)
+
+
+def _decode_args(s):
+    """Decodes the argument types of a method descriptor or signature.
 
-    start = sig.find('(')
-    if start < 0:
-        return []
+    Both are decoded in a single pass over the string by index, without
+    copying the rest of the string for each argument.
+    """
+
+    i = s.find('(')
+    if i < 0:
+        return ()
+    i += 1
 
     args = []
-    s = sig[start+1:sig.find(')', start)]
-    while s:
-        arg, s = _next_arg(s)
-        args.append(arg)
-
-    return args
-
-
-# TODO there's an unimplemented stub in javatools to produce "pretty"
-# signatures. When that is implemented, check if it can be used.
-def _next_arg(s):
-    c = s[0]
-    if c in _PRIMITIVE_TYPES:
-        return (_PRIMITIVE_TYPES[c], s[1:])
-    elif c == 'T':
-        i = s.find(';')
-        return (s[1:i], s[i+1:])
-    elif c == 'L':
-        name, s = _next_arg_class(s[1:])
-        return (name.replace('/', '.'), s)
-    elif c == '[':
-        t, s = _next_arg(s[1:])
-        return ('{}[]'.format(t), s)
-    else:
-        raise ValueError('unknown arg type: {} in {}'.format(c, s))
-
-
-def _next_arg_class(s):
-    end = name_end = len(s)
-
-    type_arg_count = 0
-    for i in range(0, len(s)):
+    while s[i] != ')':
+        start = i
+        while s[i] == '[':
+            i += 1
+        dimensions = i - start
+
         c = s[i]
+        if c in _PRIMITIVE_TYPES:
+            name = _PRIMITIVE_TYPES[c]
+            i += 1
+        elif c == 'T':
+            end = s.index(';', i)
+            name = s[i+1:end]
+            i = end + 1
+        elif c == 'L':
+            name, i = _decode_class(s, i + 1)
+        else:
+            raise ValueError('unknown arg type: {} in {}'.format(c, s))
+
+        args.append(name + '[]' * dimensions if dimensions else name)
+
+    return tuple(args)
+
+
+def _decode_class(s, i):
+    """Decodes a class type that starts at index i, after the 'L'.
+
+    Returns:
+        A tuple of (erased class name, index after the type).
+    """
+
+    segments = []
+    while True:
+        match = _CLASS_NAME_END.search(s, i)
+        if not match:
+            raise ValueError('unterminated class type in {}'.format(s))
+
+        end = match.start()
+        segments.append(s[i:end])
+
+        c = s[end]
+        if c == '<':
+            end = _skip_type_arguments(s, end)
+            c = s[end]
+
+        i = end + 1
         if c == ';':
-            name_end = min(i, name_end)
-            if type_arg_count == 0:
-                end = i + 1
-                break
-        elif c == '<':
-            name_end = min(i, name_end)
-            type_arg_count += 1
-        elif c == '>':
-            type_arg_count -= 1
-
-    return (s[:name_end], s[end:])
+            return '$'.join(segments).replace('/', '.'), i
+
+
+def _skip_type_arguments(s, i):
+    """Returns the index after the type arguments that start at index i."""
+    depth = 0
+    for match in _TYPE_ARGUMENT_BRACKET.finditer(s, i):
+        if match.group() == '<':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+
+    raise ValueError('unterminated type arguments in {}'.format(s))
@@ -1,35 +1,64 @@
 import contextlib
+import errno
+import json
 import os
 import traceback
-import urllib2
 
 import docutils.nodes
 import docutils.utils
 
-from urllib import quote as urlquote, pathname2url
+from urllib import quote as urlquote, unquote as urlunquote, pathname2url, url2pathname
 from urlparse import urlparse, urlunparse, urljoin
 
 from docutils.parsers import rst
+from docutils.transforms import Transform
 from sphinx.util.nodes import split_explicit_title
 
-from .loader import ClassLoader
 from .model import parse_name
+from .stats import Stats
+
+# The loader, its caches, and the network and thread modules are imported
+# by the functions that use them, so loading the extension stays fast for
+# builds that never resolve a reference.
 
 
 CONFIG_VALUES = {
-    'javalink_classpath': ([], 'env', 'javalink_classloader'),
+    'javalink_classpath': ([], '', None),
+    'javalink_cache_dir': (None, '', None),
     'javalink_docroots': ([], 'env', 'javalink_packages'),
+    'javalink_docroot_timeout': (30, '', None),
     'javalink_default_version': (7, 'env', None),
     'javalink_add_package_names': (True, 'env', None),
     'javalink_qualify_nested_types': (True, 'env', None),
-    'javalink_add_method_parameters': (True, 'env', None)
+    'javalink_add_method_parameters': (True, 'env', None),
+    'javalink_stats_file': (None, '', None),
+    'javalink_deferred_resolution': (False, 'env', None),
+    'javalink_verify_anchors': (False, '', None),
+    'javalink_prefetch_imports': (False, '', None),
+    'javalink_warmup': ([], '', None),
+    'javalink_warmup_processes': (None, '', None)
 }
 
 
+# imports that every document has, even without a javaimport directive
+DEFAULT_IMPORTS = (('java.lang', '*'),)
+
+
 def abspath(root, path):
     return os.path.normpath(os.path.join(root, path))
 
 
+def get_classpath(env):
+    """Returns the absolute classpath and cache directory of a project."""
+    classpath = [abspath(env.srcdir, p) for p in env.config.javalink_classpath]
+
+    cache_dir = env.config.javalink_cache_dir
+    if cache_dir:
+        cache_dir = abspath(env.srcdir, cache_dir)
+
+    return classpath, cache_dir
+
+
 class EnvAccessor(object):
     @property
     def env(self):
@@ -38,11 +67,62 @@ class EnvAccessor(object):
     @property
     def classloader(self):
         if not hasattr(self.env, 'javalink_classloader'):
-            classpath = self.env.config.javalink_classpath
-            loader = ClassLoader([abspath(self.env.srcdir, p) for p in classpath])
-            self.env.javalink_classloader = loader
+            from .loader import ClassLoader
+
+            classpath, cache_dir = get_classpath(self.env)
+            self.env.javalink_classloader = ClassLoader(classpath, cache_dir, self.stats)
+
+        loader = self.env.javalink_classloader
+        if loader.stats is not self.stats:
+            loader.stats = self.stats
+
+        return loader
+
+    @property
+    def stats(self):
+        if not hasattr(self.env, 'javalink_stats'):
+            self.env.javalink_stats = Stats()
+
+        return self.env.javalink_stats
+
+    @property
+    def dependencies(self):
+        if not hasattr(self.env, 'javalink_dependencies'):
+            self.env.javalink_dependencies = {}
+
+        docname = self.env.docname
+        try:
+            return self.env.javalink_dependencies[docname]
+        except KeyError:
+            from .loader import Dependencies
+
+            dependencies = Dependencies()
+            self.env.javalink_dependencies[docname] = dependencies
+            return dependencies
+
+    @property
+    def references(self):
+        """The resolved references, shared by all documents and builds."""
+        if not hasattr(self.env, 'javalink_references'):
+            self.env.javalink_references = {}
+
+        return self.env.javalink_references
+
+    @property
+    def reference_keys(self):
+        """The keys of the cached references used by the current document."""
+        if not hasattr(self.env, 'javalink_reference_keys'):
+            self.env.javalink_reference_keys = {}
+
+        return self.env.javalink_reference_keys.setdefault(self.env.docname, set())
+
+    @property
+    def links(self):
+        """The links with fragments in the documents read in this build."""
+        if not hasattr(self.env, 'javalink_links'):
+            self.env.javalink_links = {}
 
-        return self.env.javalink_classloader
+        return self.env.javalink_links.setdefault(self.env.docname, [])
 
     @property
     def imports(self):
@@ -51,6 +131,12 @@ class EnvAccessor(object):
 
         return self.env.javalink_imports
 
+    @property
+    def namespace(self):
+        """The Namespace for the imports of the current document."""
+        imports = self.imports.get(self.env.docname, DEFAULT_IMPORTS)
+        return self.classloader.namespace(imports)
+
 
 class JavarefImportDirective(rst.Directive, EnvAccessor):
     required_arguments = 0
@@ -62,27 +148,63 @@ class JavarefImportDirective(rst.Directive, EnvAccessor):
         return self.state.document.settings.env
 
     def run(self):
+        with self.classloader.recording(self.dependencies):
+            return self._add_imports()
+
+    def _add_imports(self):
         docname = self.env.docname
-        imports = self.imports.setdefault(docname, [('java.lang', '*')])
+        imports = self.imports.setdefault(docname, list(DEFAULT_IMPORTS))
 
+        messages = []
+        added = []
         for i in self.content:
             package, name = parse_name(i.strip())
             if (package.name, name) not in imports:
                 # TODO make this work with Package objects
-                self._validate_import(package.name, name)
+                self.stats.incr('imports')
+                messages.extend(self._validate_import(package.name, name))
                 imports.append((package.name, name))
+                added.append('{}.{}'.format(package.name, name))
+
+        # build the namespace now so that conflicts are reported here
+        for name, first, other in self.namespace.conflicts:
+            if other in added:
+                msg = "conflicting import '{}'; '{}' refers to '{}'".format(other, name, first)
+                messages.append(self._warning(msg))
+
+        if self.env.config.javalink_prefetch_imports:
+            self._prefetch(added)
+
+        return messages
+
+    def _prefetch(self, imports):
+        """Starts reading the classes provided by imports in the background."""
+        names = []
+        for i in imports:
+            package, _, name = i.rpartition('.')
+            if name == '*':
+                names.extend('{}.{}'.format(package, c) for c in self.classloader.package_classes(package))
+            else:
+                binary_name = self.classloader.resolve(i)
+                if binary_name:
+                    names.append(binary_name)
 
-        return []
+        self.classloader.prefetch(names)
 
-    # TODO handle conflicting imports
     def _validate_import(self, package, name):
         if name == '*':
             entity = self.classloader.find_package(package)
         else:
-            entity = self.classloader.load('{}.{}'.format(package, name))
+            entity = self.classloader.resolve('{}.{}'.format(package, name))
 
         if not entity:
-            self.error("unresolved import '{}.{}'".format(package, name))
+            self.stats.incr('unresolved_imports')
+            return [self._warning("unresolved import '{}.{}'".format(package, name))]
+
+        return []
+
+    def _warning(self, msg):
+        return self.state.document.reporter.warning(msg, line=self.lineno)
 
 
 def purge_imports(app, env, docname):
@@ -93,7 +215,7 @@ def purge_imports(app, env, docname):
             pass
 
 
-def merge_imports(env, docnames, other):
+def merge_imports(app, env, docnames, other):
     if not hasattr(other, 'javalink_imports'):
         return
     if not hasattr(env, 'javalink_imports'):
@@ -105,11 +227,310 @@ def merge_imports(env, docnames, other):
         env.javalink_imports.setdefault(doc, []).extend(imports)
 
 
+def purge_dependencies(app, env, docname):
+    if hasattr(env, 'javalink_dependencies'):
+        env.javalink_dependencies.pop(docname, None)
+
+
+def merge_dependencies(app, env, docnames, other):
+    if not hasattr(other, 'javalink_dependencies'):
+        return
+    if not hasattr(env, 'javalink_dependencies'):
+        env.javalink_dependencies = {}
+
+    for doc in docnames:
+        if doc in other.javalink_dependencies:
+            env.javalink_dependencies[doc] = other.javalink_dependencies[doc]
+
+
+def purge_links(app, env, docname):
+    if hasattr(env, 'javalink_links'):
+        env.javalink_links.pop(docname, None)
+
+
+def merge_links(app, env, docnames, other):
+    if not hasattr(other, 'javalink_links'):
+        return
+    if not hasattr(env, 'javalink_links'):
+        env.javalink_links = {}
+
+    for doc in docnames:
+        if doc in other.javalink_links:
+            env.javalink_links[doc] = other.javalink_links[doc]
+
+
+def verify_anchors(app, env):
+    """Checks that the fragments of links to local docroots exist.
+
+    The javadoc pages linked from the documents read in this build are
+    scanned concurrently. The anchors of each page are stored in the
+    environment, so pages are only scanned again when they change. Links
+    to remote docroots are not checked.
+    """
+
+    links = getattr(env, 'javalink_links', None)
+    env.javalink_links = {}
+    if not links or not app.config.javalink_verify_anchors:
+        return
+
+    # {link base : local directory}
+    directories = {}
+    for docroot in app.config.javalink_docroots:
+        docroot = normalize_docroot(app, docroot)
+        root = urlparse(docroot['root'])
+        if root.scheme == 'file':
+            directories.setdefault(docroot['base'], os.path.dirname(url2pathname(root.path)))
+
+    # {docname : [(page path, fragment, reftext, line)]}
+    targets = {}
+    for docname, doc_links in links.iteritems():
+        for url, reftext, line in doc_links:
+            page, _, fragment = url.partition('#')
+            path = _find_local_page(directories, page)
+            if path:
+                targets.setdefault(docname, []).append((path, urlunquote(fragment), reftext, line))
+
+    if not targets:
+        return
+
+    if not hasattr(env, 'javalink_anchors'):
+        env.javalink_anchors = {}
+
+    from .anchors import find_anchors
+
+    paths = set(t[0] for doc_targets in targets.itervalues() for t in doc_targets)
+    app.verbose('[javalink] verifying anchors in %d javadoc pages...', len(paths))
+
+    stats = env.javalink_stats
+    with stats.timer('anchor_verification'):
+        anchors = find_anchors(paths, env.javalink_anchors)
+
+    for docname in sorted(targets):
+        for path, fragment, reftext, line in targets[docname]:
+            stats.incr('verified_anchors')
+            page_anchors = anchors[path]
+            if page_anchors is None:
+                msg = "could not read javadoc page '{}' for '{}'".format(path, reftext)
+            elif fragment not in page_anchors:
+                msg = "anchor '{}' not found in '{}' for '{}'".format(fragment, path, reftext)
+            else:
+                continue
+
+            stats.incr('missing_anchors')
+            env.warn(docname, msg, line)
+
+
+def _find_local_page(directories, url):
+    """Returns the local path of a javadoc page or None if it is remote."""
+    # nested docroots share a prefix with their parents, so the longest
+    # matching base is the docroot of the page
+    for base in sorted(directories, key=len, reverse=True):
+        if url.startswith(base):
+            return os.path.join(directories[base], url2pathname(url[len(base):]))
+
+    return None
+
+
+def find_outdated_docs(app, env, added, changed, removed):
+    """Finds documents that depend on parts of the classpath that changed.
+
+    The classloader is updated to match the current classpath; classes
+    from jars or directories that were added, removed, or modified since
+    the last build are discarded. Documents and cached references that
+    used these classes, or that failed to find a class that now exists,
+    are read or resolved again.
+
+    Returns:
+        A list of the names of outdated documents.
+    """
+
+    loader = getattr(env, 'javalink_classloader', None)
+    if loader is None:
+        return []
+
+    classpath, cache_dir = get_classpath(env)
+    changed_packages = loader.refresh(classpath, cache_dir)
+    if not changed_packages:
+        return []
+
+    references = getattr(env, 'javalink_references', {})
+    for key, (_, _, _, deps) in references.items():
+        if deps.is_outdated(loader, changed_packages):
+            del references[key]
+
+    dependencies = getattr(env, 'javalink_dependencies', {})
+    outdated = [doc for doc, deps in dependencies.iteritems()
+                if doc not in removed and deps.is_outdated(loader, changed_packages)]
+
+    app.verbose('[javalink] classpath has changed, %d documents are outdated', len(outdated))
+    return outdated
+
+
+def warm_up_classloader(app):
+    """Reads the classes listed in javalink_warmup on a process pool.
+
+    Only cold builds, which start without a classloader, are warmed up.
+    Incremental builds read the classes they need on demand.
+    """
+
+    env = app.env
+    if not app.config.javalink_warmup or hasattr(env, 'javalink_classloader'):
+        return
+
+    from .loader import ClassLoader, expand_path
+
+    classpath, cache_dir = get_classpath(env)
+    loader = ClassLoader(classpath, cache_dir, env.javalink_stats)
+    env.javalink_classloader = loader
+
+    packages = []
+    paths = []
+    for value in app.config.javalink_warmup:
+        path = abspath(env.srcdir, value)
+        if os.path.exists(path) or os.path.basename(path) == '*':
+            for p in expand_path(path):
+                if p in loader.paths:
+                    paths.append(p)
+                else:
+                    app.warn('[javalink] {} is not on the classpath; not warming it up'.format(p))
+        else:
+            packages.append(value)
+
+    app.verbose('[javalink] warming up classloader...')
+    with env.javalink_stats.timer('warm_up'):
+        count = loader.warm_up(packages, paths, app.config.javalink_warmup_processes)
+    app.verbose('[javalink] read %d classes', count)
+
+
+def preload_package_list(app, env, docnames):
+    """Loads the package lists before documents are read in parallel.
+
+    Each parallel reader would load its own copy of lists loaded on
+    demand, so they are loaded once by the main process instead.
+    """
+
+    if docnames and app.parallel > 1:
+        initialize_package_list(app)
+
+
+def validate_references(app):
+    """Discards the cached references if the way they resolve has changed.
+
+    References depend on the configuration values that control titles and
+    links, including the docroots. The package lists of the docroots are
+    only loaded when a reference needs them, so they are compared by
+    initialize_package_list instead. Changes to the classpath are handled
+    by find_outdated_docs.
+    """
+
+    env = app.env
+    context = (app.config.javalink_add_package_names,
+               app.config.javalink_qualify_nested_types,
+               app.config.javalink_add_method_parameters,
+               app.config.javalink_default_version,
+               repr(app.config.javalink_docroots))
+
+    if getattr(env, 'javalink_references_context', None) != context:
+        if getattr(env, 'javalink_references', None):
+            app.verbose('[javalink] reference context has changed, clearing cached references')
+        env.javalink_references = {}
+        env.javalink_references_context = context
+
+    # the package lists are loaded again by the first reference of each
+    # build, so changes to remote lists are seen
+    for attr in ('javalink_packages', 'javalink_packages_versions'):
+        if hasattr(env, attr):
+            delattr(env, attr)
+
+
+def purge_references(app, env, docname):
+    if hasattr(env, 'javalink_reference_keys'):
+        env.javalink_reference_keys.pop(docname, None)
+
+
+def merge_references(app, env, docnames, other):
+    if not hasattr(other, 'javalink_references'):
+        return
+    if not hasattr(env, 'javalink_references'):
+        env.javalink_references = {}
+    if not hasattr(env, 'javalink_reference_keys'):
+        env.javalink_reference_keys = {}
+
+    for key, value in other.javalink_references.iteritems():
+        env.javalink_references.setdefault(key, value)
+
+    other_keys = getattr(other, 'javalink_reference_keys', {})
+    for doc in docnames:
+        if doc in other_keys:
+            env.javalink_reference_keys[doc] = other_keys[doc]
+
+
+def prune_references(app, env):
+    """Discards the cached references that no document uses anymore."""
+    references = getattr(env, 'javalink_references', None)
+    if not references:
+        return
+
+    used = set()
+    for keys in getattr(env, 'javalink_reference_keys', {}).itervalues():
+        used.update(keys)
+
+    unused = [key for key in references if key not in used]
+    for key in unused:
+        del references[key]
+
+    if unused:
+        app.verbose('[javalink] discarded %d unused cached references', len(unused))
+
+
+def merge_classloader(app, env, docnames, other):
+    if not hasattr(other, 'javalink_classloader'):
+        return
+
+    if hasattr(env, 'javalink_classloader'):
+        env.javalink_classloader.merge(other.javalink_classloader)
+    else:
+        env.javalink_classloader = other.javalink_classloader
+
+
+def merge_stats(app, env, docnames, other):
+    if not hasattr(other, 'javalink_stats'):
+        return
+
+    if hasattr(env, 'javalink_stats'):
+        env.javalink_stats.merge(other.javalink_stats)
+    else:
+        env.javalink_stats = other.javalink_stats
+
+
 def cleanup(app, exception):
     if hasattr(app.env, 'javalink_classloader'):
         app.env.javalink_classloader.close()
 
 
+def report_stats(app, exception):
+    """Reports the statistics collected during the build.
+
+    The statistics are always logged in verbose mode and are written as
+    JSON to ``javalink_stats_file`` if it is set.
+    """
+
+    stats = getattr(app.env, 'javalink_stats', None)
+    if stats is None:
+        return
+
+    app.verbose('[javalink] build statistics: %s', stats)
+
+    stats_file = app.config.javalink_stats_file
+    if stats_file:
+        stats_file = abspath(app.env.srcdir, stats_file)
+        if not os.path.isdir(os.path.dirname(stats_file)):
+            os.makedirs(os.path.dirname(stats_file))
+
+        with open(stats_file, 'w') as f:
+            json.dump(stats.to_dict(), f, indent=2, sort_keys=True)
+
+
 class JavarefRole(EnvAccessor):
     def __init__(self, app):
         self.app = app
@@ -118,12 +539,12 @@ class JavarefRole(EnvAccessor):
     def env(self):
         return self.app.env
 
-    def find_ref(self, reftext):
+    def find_ref(self, reftext, imports=None):
         reftext = reftext.strip()
 
         # TODO add additional validation (see SeeTagImpl.java)
         where, _, what = reftext.partition('#')
-        clazz = self._find_class(where)
+        clazz = self._find_class(where, imports)
         if clazz:
             where = clazz.full_name
             if what:
@@ -189,60 +610,119 @@ class JavarefRole(EnvAccessor):
 
         return '.'.join(title)
 
-    def _find_class(self, where):
-        import_name = where.partition('.')[0]
-        imports = self.imports.get(self.env.docname, [])
+    def _find_class(self, where, imports=None):
+        binary_name = self.classloader.resolve(where)
+        if not binary_name:
+            import_name, dot, nested = where.partition('.')
 
-        candidates = [where]
-        for package, name in imports:
-            if name == import_name or name == '*':
-                candidates.append('{}.{}'.format(package, where))
+            if imports is None:
+                namespace = self.namespace
+            else:
+                namespace = self.classloader.namespace(imports)
 
-        for name in candidates:
-            clazz = self.classloader.load(name)
-            if clazz:
-                return clazz
+            candidates = namespace.lookup(import_name)
+            if len(candidates) > 1:
+                msg = "ambiguous reference: '{}' could be any of {}"
+                names = ', '.join("'{}'".format(c) for c in candidates)
+                raise JavarefError(msg.format(import_name, names))
 
-            # try all possible class nestings
-            sep = name.rfind('.')
-            while sep >= 0:
-                name = name[:sep] + '$' + name[sep+1:]
-                clazz = self.classloader.load(name)
-                if clazz:
-                    return clazz
+            if candidates:
+                binary_name = self.classloader.resolve(candidates[0] + dot + nested)
 
-                sep = name.rfind('.', 0, sep)
+        if binary_name:
+            return self.classloader.load(binary_name)
 
         return None
 
     def _find_url_root(self, where):
         package, _ = parse_name(where)
+        initialize_package_list(self.app)
         return self.env.javalink_packages.get(package.name, None)
 
     def _find_java_version(self, where):
         package, _ = parse_name(where)
+        initialize_package_list(self.app)
         return self.env.javalink_packages_versions.get(package.name, self.app.config.javalink_default_version)
 
-    def __call__(self, name, rawtext, text, lineno, inliner,
-                 options={}, content=[]):
+    def resolve(self, reftext, title=None, imports=None):
+        """Resolves a reference to a URL and a title.
 
-        text = docutils.utils.unescape(text)
-        has_title, title, reftext = split_explicit_title(text)
+        Args:
+            reftext: The reference target.
+            title: An explicit title, or None to generate a title.
+            imports: The imports used to resolve the reference (optional).
+                Defaults to the imports of the current document.
+
+        Returns:
+            A tuple of (url, title, warnings). The URL is None if the
+            reference could not be resolved. URLs of local docroots are
+            relative to the source directory.
+        """
 
+        if imports is None:
+            imports = self.imports.get(self.env.docname, DEFAULT_IMPORTS)
+
+        key = (tuple(imports), reftext, title)
+        self.stats.incr('references')
+
+        # cached references are only valid for the package lists they
+        # were resolved with
+        initialize_package_list(self.app)
+        try:
+            url, title, warnings, dependencies = self.references[key]
+            self.stats.incr('reference_cache_hits')
+        except KeyError:
+            self.stats.incr('reference_cache_misses')
+            from .loader import Dependencies
+
+            with self.classloader.recording(Dependencies()) as dependencies:
+                url, title, warnings = self._resolve(reftext, title, imports)
+            self.references[key] = (url, title, warnings, dependencies)
+
+        self.reference_keys.add(key)
+        if url is None:
+            self.stats.incr('unresolved_references')
+
+        self.dependencies.update(dependencies)
+        return url, title, list(warnings)
+
+    def add_link(self, url, reftext, line):
+        """Records a link so its fragment can be verified after reading."""
+        if url and '#' in url and self.app.config.javalink_verify_anchors:
+            self.links.append((url, reftext, line))
+
+    def _resolve(self, reftext, title, imports):
         warnings = []
         try:
-            where, what = self.find_ref(reftext)
-            url = self.to_url(where, what)
-            if not has_title:
-                title = self.to_title(where, what)
+            with self.stats.timer('resolution'):
+                where, what = self.find_ref(reftext, imports)
+                url = self.to_url(where, what)
+                if title is None:
+                    title = self.to_title(where, what)
         except JavarefError as e:
+            # lookups of simple names fail before imports are tried, so
+            # only references that don't resolve at all are counted
+            self.stats.incr('failed_lookups')
             url = None
             warnings.append(e.reason)
 
+        if title is None:
+            title = reftext
+
+        return url, title, tuple(warnings)
+
+    def make_node(self, url, title, docdir):
+        """Creates the node for a resolved or unresolved reference.
+
+        Args:
+            url: The URL of the reference or None.
+            title: The title of the reference.
+            docdir: The directory of the document containing the reference.
+        """
+
         if url:
             # if no scheme, assume a local path relative to the src root
             if not urlparse(url).scheme:
-                docdir = os.path.dirname(inliner.document.current_source)
                 if docdir != self.env.srcdir:
                     url = os.path.relpath(self.env.srcdir, docdir) + '/' + url
 
@@ -251,9 +731,101 @@ class JavarefRole(EnvAccessor):
         else:
             ref = docutils.nodes.literal(rawsource=title, text=title)
 
+        return ref
+
+    def __call__(self, name, rawtext, text, lineno, inliner,
+                 options={}, content=[]):
+
+        text = docutils.utils.unescape(text)
+        has_title, title, reftext = split_explicit_title(text)
+        if not has_title:
+            title = None
+
+        docdir = os.path.dirname(inliner.document.current_source)
+
+        if self.app.config.javalink_deferred_resolution:
+            imports = self.imports.get(self.env.docname, DEFAULT_IMPORTS)
+            node = pending_javaref(rawtext, reftext=reftext, title=title,
+                                   imports=tuple(imports), docdir=docdir)
+            node.line = lineno
+            return [node], []
+
+        url, title, warnings = self.resolve(reftext, title)
+        self.add_link(url, reftext, lineno)
+        ref = self.make_node(url, title, docdir)
         return [ref], [inliner.reporter.warning(w, line=lineno) for w in warnings]
 
 
+class pending_javaref(docutils.nodes.Inline, docutils.nodes.Element):
+    """A javaref that is resolved after the whole document is read.
+
+    Attributes:
+        reftext: The reference target.
+        title: The explicit title of the reference or None.
+        imports: The imports of the document at the reference.
+        docdir: The directory of the document.
+    """
+
+
+class ResolvePendingRefs(Transform):
+    """Resolves the pending references of a document after it is parsed.
+
+    References must be resolved before Sphinx collects the section titles
+    and table of contents of the document, which happens before the
+    doctree-read event, so this runs as a transform. It runs after
+    substitutions, which can contain references.
+    """
+
+    default_priority = 700
+
+    def apply(self):
+        env = self.document.settings.env
+        resolve_pending_refs(env.app, self.document)
+
+
+def resolve_pending_refs(app, doctree):
+    """Resolves all pending references in a document at once.
+
+    Each distinct reference is resolved once. The classes needed to
+    resolve member references are read first, in the order they are
+    stored on the classpath, so each jar is read sequentially.
+    """
+
+    nodes = doctree.traverse(pending_javaref)
+    if not nodes:
+        return
+
+    role = JavarefRole(app)
+
+    targets = set((node['imports'], node['reftext']) for node in nodes)
+
+    classes = []
+    for imports, reftext in targets:
+        where, _, what = reftext.strip().partition('#')
+        if what:
+            try:
+                clazz = role._find_class(where, imports)
+            except JavarefError:
+                continue
+            if clazz:
+                classes.append(clazz)
+
+    role.classloader.preload(classes)
+
+    # {(imports, reftext, title) : (url, title, warnings)}
+    results = {}
+    for node in nodes:
+        imports, reftext, title = key = (node['imports'], node['reftext'], node['title'])
+        if key not in results:
+            results[key] = role.resolve(reftext, title, imports)
+
+        url, title, warnings = results[key]
+        role.add_link(url, reftext, node.line)
+        node.replace_self(role.make_node(url, title, node['docdir']))
+        for w in warnings:
+            app.env.warn(app.env.docname, w, node.line)
+
+
 class JavarefError(Exception):
     """Raised when a reference to a Java element cannot be resolved.
 
@@ -268,7 +840,19 @@ class JavarefError(Exception):
         return str(self.reason)
 
 
+# maximum number of package lists to fetch at the same time
+MAX_FETCH_THREADS = 8
+
+
 def initialize_package_list(app):
+    """Loads the package lists of the docroots if they are not loaded.
+
+    Package lists are loaded when the first reference is resolved, so
+    builds that don't resolve references never fetch them. If the lists
+    differ from those the cached references were resolved with, the
+    cached references are discarded.
+    """
+
     env = app.env
     if hasattr(env, 'javalink_packages') and hasattr(env, 'javalink_packages_versions'):
         return
@@ -277,20 +861,120 @@ def initialize_package_list(app):
     env.javalink_packages = {}
     env.javalink_packages_versions = {}
 
-    for docroot_dict in [normalize_docroot(app, r) for r in app.config.javalink_docroots]:
-        try:
-            with contextlib.closing(urllib2.urlopen(docroot_dict['root'])) as package_list:
-                for package in package_list:
-                    package = package.strip()
-                    if package not in env.javalink_packages:
-                        env.javalink_packages[package] = docroot_dict['base']
-                        env.javalink_packages_versions[package] = docroot_dict['version']
-                    else:
-                        app.warn("[javalink] duplicate package '{}' in {}".format(package, url))
-
-        except urllib2.URLError:
+    cache = None
+    if app.config.javalink_cache_dir:
+        from .cache import UrlCache
+
+        cache = UrlCache(abspath(env.srcdir, app.config.javalink_cache_dir))
+
+    stats = getattr(env, 'javalink_stats', None) or Stats()
+
+    docroots = [normalize_docroot(app, r) for r in app.config.javalink_docroots]
+    with stats.timer('package_lists'):
+        package_lists = fetch_package_lists([r['root'] for r in docroots],
+                                            app.config.javalink_docroot_timeout,
+                                            cache)
+
+    # process results in configuration order so the first docroot that
+    # contains a package always wins
+    for docroot_dict, (packages, error) in zip(docroots, package_lists):
+        url = docroot_dict['root']
+        if error:
+            stats.incr('package_list_failures')
             app.warn('[javalink] could not get {}; some links may not resolve'.format(url))
-            app.verbose('[javalink] %s', traceback.format_exc())
+            app.verbose('[javalink] %s', error)
+            continue
+
+        for package in packages:
+            if package not in env.javalink_packages:
+                env.javalink_packages[package] = docroot_dict['base']
+                env.javalink_packages_versions[package] = docroot_dict['version']
+            else:
+                app.warn("[javalink] duplicate package '{}' in {}".format(package, url))
+
+    digest = (hash(frozenset(env.javalink_packages.iteritems())),
+              hash(frozenset(env.javalink_packages_versions.iteritems())))
+    if getattr(env, 'javalink_references_packages', None) != digest:
+        if getattr(env, 'javalink_references', None):
+            app.verbose('[javalink] package lists have changed, clearing cached references')
+        env.javalink_references = {}
+        env.javalink_references_packages = digest
+
+
+def fetch_package_lists(urls, timeout=None, cache=None):
+    """Fetches package-list files concurrently.
+
+    If a package-list file does not exist, the element-list file in the
+    same directory is used instead. Newer versions of javadoc only
+    generate element-list files.
+
+    Args:
+        urls: A list of package-list URLs.
+        timeout: The timeout in seconds for each request (optional).
+        cache: A UrlCache for remote files (optional).
+
+    Returns:
+        A list with a tuple of (packages, error) for each URL, in the same
+        order as the URLs. If a request fails, packages is None and error
+        is the formatted traceback of the failure.
+    """
+
+    if not urls:
+        return []
+
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(min(len(urls), MAX_FETCH_THREADS))
+    try:
+        return pool.map(lambda url: _fetch_package_list(url, timeout, cache), urls)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _fetch_package_list(url, timeout, cache):
+    import httplib
+    import socket
+    import urllib2
+
+    fetch = cache.fetch if cache else _fetch_url
+    try:
+        try:
+            content = fetch(url, timeout)
+        except (urllib2.URLError, socket.error) as e:
+            if not _is_not_found(e):
+                raise
+            content = fetch(urljoin(url, 'element-list'), timeout)
+    except (urllib2.URLError, socket.error, httplib.HTTPException):
+        return None, traceback.format_exc()
+
+    packages = []
+    for line in content.splitlines():
+        line = line.strip()
+        # element-list files also contain module names
+        if line and not line.startswith('module:'):
+            packages.append(line)
+
+    return packages, None
+
+
+def _fetch_url(url, timeout):
+    import urllib2
+
+    from .cache import read_response
+
+    with contextlib.closing(urllib2.urlopen(url, timeout=timeout)) as f:
+        return read_response(f)
+
+
+def _is_not_found(e):
+    import urllib2
+
+    if isinstance(e, urllib2.HTTPError):
+        return e.code in (404, 410)
+
+    reason = getattr(e, 'reason', None)
+    return getattr(reason, 'errno', None) == errno.ENOENT
 
 
 def normalize_docroot(app, root):
@@ -0,0 +1,81 @@
+import contextlib
+import os
+import threading
+import time
+
+
+class Stats(object):
+    """Counts the work done by javalink during a build.
+
+    Counters are incremented by name. Timers accumulate the wall clock
+    seconds spent in named sections; sections may be nested, so timers
+    can overlap.
+
+    Statistics collected in a child process (e.g. a parallel reader) start
+    from zero in that process, so the child's statistics can be merged
+    into the parent's without counting anything twice.
+
+    Statistics may be updated from several threads, e.g. by threads that
+    prefetch classes.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+        # {name : count}
+        self.counters = {}
+        # {name : seconds}
+        self.timers = {}
+
+    def incr(self, name, count=1):
+        self._check_process()
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self._add_time(name, time.time() - start)
+
+    def merge(self, other):
+        for name, count in other.counters.iteritems():
+            self.incr(name, count)
+        for name, seconds in other.timers.iteritems():
+            self._add_time(name, seconds)
+
+    def _add_time(self, name, seconds):
+        self._check_process()
+        with self._lock:
+            self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def to_dict(self):
+        return {'counters': dict(self.counters), 'timers': dict(self.timers)}
+
+    def __str__(self):
+        values = ['{}={}'.format(k, v) for k, v in sorted(self.counters.iteritems())]
+        values.extend('{}={:.3f}s'.format(k, v) for k, v in sorted(self.timers.iteritems()))
+        return ', '.join(values)
+
+    def _check_process(self):
+        if self.pid != os.getpid():
+            # the lock may have been held by another thread during the fork
+            self._lock = threading.Lock()
+            self.pid = os.getpid()
+            self.counters = {}
+            self.timers = {}
+
+    def __getstate__(self):
+        # a child process that never updated its statistics still holds
+        # the parent's, which must not be merged into the parent again
+        self._check_process()
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,90 @@
+"""Helpers that write classpaths and Sphinx projects for the tests."""
+
+import os
+import sys
+import zipfile
+
+from StringIO import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'benchmarks'))
+
+from synthetic import ClassFileWriter  # noqa: E402
+
+
+def write_class(name, superclass='java/lang/Object', methods=('run',)):
+    """Returns a class file with a constructor and methods without arguments.
+
+    By default, the class has a method named 'run'.
+    """
+    writer = ClassFileWriter(name.replace('.', '/'), superclass)
+    writer.add_method('<init>', '()V')
+    for method in methods:
+        writer.add_method(method, '()V')
+    return writer.to_bytes()
+
+
+def write_jar(path, names, methods=('run',)):
+    """Writes a jar with a class for each fully qualified name."""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as jar:
+        for name in names:
+            jar.writestr(name.replace('.', '/') + '.class', write_class(name, methods=methods))
+    return path
+
+
+def write_docroot(directory, packages):
+    """Writes a local docroot with a package-list for the given packages."""
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(os.path.join(directory, 'package-list'), 'w') as f:
+        f.write(''.join(p + '\n' for p in packages))
+    return directory
+
+
+def build(srcdir, config, documents, freshenv=True):
+    """Builds an HTML project and returns (the application, the warnings).
+
+    The names of the documents read by the build are stored in the
+    read_docs attribute of the application.
+
+    Args:
+        srcdir: The directory of the project, which is created.
+        config: A dict of configuration values in addition to the javalink
+            extension.
+        documents: A dict from document name to reStructuredText source; the
+            master document is 'index'.
+        freshenv: False to reuse the environment of an earlier build.
+    """
+
+    # imported here so the helpers above work without Sphinx installed
+    from sphinx.application import Sphinx
+
+    if not os.path.isdir(srcdir):
+        os.makedirs(srcdir)
+
+    with open(os.path.join(srcdir, 'conf.py'), 'w') as f:
+        f.write('extensions = ["javalink"]\n')
+        f.write('master_doc = "index"\n')
+        for name, value in sorted(config.items()):
+            f.write('{} = {!r}\n'.format(name, value))
+
+    for name, source in documents.items():
+        with open(os.path.join(srcdir, name + '.rst'), 'w') as f:
+            f.write(source)
+
+    outdir = os.path.join(srcdir, '_build', 'html')
+    doctreedir = os.path.join(srcdir, '_build', 'doctrees')
+    warnings = StringIO()
+
+    app = Sphinx(srcdir, srcdir, outdir, doctreedir, 'html',
+                 status=None, warning=warnings, freshenv=freshenv)
+    app.read_docs = []
+    app.connect('env-before-read-docs', lambda app, env, docnames: app.read_docs.extend(docnames))
+    app.build()
+    return app, warnings.getvalue()
+
+
+def read_page(app, docname):
+    """Returns the HTML page that a build wrote for a document."""
+    with open(os.path.join(app.outdir, docname + '.html')) as f:
+        return f.read()
@@ -0,0 +1,122 @@
+import BaseHTTPServer
+import httplib
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib2
+
+from javalink.cache import UrlCache
+from javalink.ref import fetch_package_lists
+
+# a status line that httplib can't parse
+BAD_STATUS_LINE = b'HTTP/1.1 OK\r\n\r\n'
+
+
+class ScriptedHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answers each request with the next response of the server's script.
+
+    A response with the status None is sent as raw bytes.
+    """
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        status, headers, body = self.server.responses.pop(0)
+
+        if status is None:
+            self.wfile.write(body)
+            return
+
+        self.send_response(status)
+        for name, value in headers.iteritems():
+            self.send_header(name, value)
+        if 'Content-Length' not in headers:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class UrlCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), ScriptedHandler)
+        self.server.requests = []
+        self.server.responses = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        self.url = 'http://127.0.0.1:{}/api/package-list'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.directory)
+
+    def fetch(self, status, headers=None, body=b''):
+        self.server.responses.append((status, headers or {}, body))
+        return UrlCache(self.directory).fetch(self.url, timeout=5)
+
+    def test_revalidates_and_falls_back(self):
+        content = self.fetch(200, {'ETag': '"v1"'}, b'com.example\n')
+        self.assertEqual(content, b'com.example\n')
+        self.assertNotIn('if-none-match', self.server.requests[-1])
+
+        content = self.fetch(304)
+        self.assertEqual(content, b'com.example\n')
+        self.assertEqual(self.server.requests[-1]['if-none-match'], '"v1"')
+
+        content = self.fetch(503, body=b'unavailable')
+        self.assertEqual(content, b'com.example\n')
+
+        content = self.fetch(429, body=b'slow down')
+        self.assertEqual(content, b'com.example\n')
+
+    def test_updates_changed_files(self):
+        self.fetch(200, {'ETag': '"v1"'}, b'com.example\n')
+
+        content = self.fetch(200, {'ETag': '"v2"'}, b'com.example\ncom.example.api\n')
+        self.assertEqual(content, b'com.example\ncom.example.api\n')
+
+        content = self.fetch(304)
+        self.assertEqual(content, b'com.example\ncom.example.api\n')
+        self.assertEqual(self.server.requests[-1]['if-none-match'], '"v2"')
+
+    def test_invalid_responses(self):
+        self.fetch(200, {'ETag': '"v1"'}, b'com.example\n')
+
+        content = self.fetch(None, body=BAD_STATUS_LINE)
+        self.assertEqual(content, b'com.example\n')
+
+        content = self.fetch(200, {'Content-Length': '100'}, b'com.')
+        self.assertEqual(content, b'com.example\n')
+
+    def test_invalid_responses_without_cached_copy(self):
+        with self.assertRaises(httplib.HTTPException):
+            self.fetch(None, body=BAD_STATUS_LINE)
+
+    def test_invalid_package_list_responses_are_reported(self):
+        self.server.responses.append((None, {}, BAD_STATUS_LINE))
+        self.server.responses.append((200, {'Content-Length': '100'}, b'com.'))
+
+        for cache in (UrlCache(self.directory), None):
+            [(packages, error)] = fetch_package_lists([self.url], 5, cache)
+            self.assertIsNone(packages)
+            self.assertIn('httplib.', error)
+
+    def test_errors_without_cached_copy(self):
+        with self.assertRaises(urllib2.HTTPError):
+            self.fetch(503)
+
+    def test_client_errors_are_not_hidden(self):
+        self.fetch(200, {'ETag': '"v1"'}, b'com.example\n')
+        with self.assertRaises(urllib2.HTTPError):
+            self.fetch(404)
+
+
+if __name__ == '__main__':
+    unittest.main()
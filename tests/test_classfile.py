@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import struct
+import unittest
+
+import javatools
+
+import support
+
+from synthetic import (ACC_BRIDGE, ACC_PUBLIC, ACC_SYNTHETIC, ACC_VARARGS, CONSTANT_DOUBLE,
+                       CONSTANT_LONG, ClassFileWriter)
+
+from javalink.classfile import scan_class
+from javalink.model import get_class_data
+
+# return; with no exception table or attributes
+CODE = ('Code', struct.pack('>HHI', 1, 1, 1) + b'\xb1' + struct.pack('>HH', 0, 0))
+
+
+def javatools_class_data(data):
+    return get_class_data(javatools.unpack_class(data))
+
+
+class ScanClassTest(unittest.TestCase):
+    def assert_same(self, writer):
+        data = writer.to_bytes()
+        self.assertEqual(scan_class(data), javatools_class_data(data))
+        return scan_class(data)
+
+    def test_plain_class(self):
+        self.assert_same(ClassFileWriter('com/example/Plain'))
+
+    def test_code_attributes(self):
+        writer = ClassFileWriter('com/example/Code')
+        writer.add_field('count')
+        writer.add_method('<init>', '()V', attributes=[CODE])
+        writer.add_method('<clinit>', '()V', attributes=[CODE])
+        writer.add_method('run', '(I)V', attributes=[CODE])
+
+        this, fields, methods = self.assert_same(writer)
+        self.assertEqual([m[0] for m in methods], ['<init>', 'run'])
+
+    def test_long_and_double_constants(self):
+        writer = ClassFileWriter('com/example/Constants')
+        writer.add_constant(CONSTANT_LONG, 1 << 40)
+        writer.add_constant(CONSTANT_DOUBLE, 0.5)
+        writer.add_constant(CONSTANT_LONG, -1)
+        writer.add_field('limit', 'J')
+        writer.add_method('scale', '(JD)D')
+
+        this, fields, methods = self.assert_same(writer)
+        self.assertEqual(this, 'com/example/Constants')
+        self.assertEqual(fields, ('limit',))
+
+    def test_bridge_and_synthetic_methods(self):
+        writer = ClassFileWriter('com/example/Bridges')
+        writer.add_method('compareTo', '(Lcom/example/Bridges;)I')
+        writer.add_method('compareTo', '(Ljava/lang/Object;)I',
+                          ACC_PUBLIC | ACC_BRIDGE | ACC_SYNTHETIC, attributes=[CODE])
+        writer.add_method('access$000', '(Lcom/example/Bridges;)I', ACC_SYNTHETIC)
+
+        this, fields, methods = self.assert_same(writer)
+        self.assertEqual([m[0] for m in methods], ['compareTo'])
+
+    def test_varargs_and_generic_signatures(self):
+        writer = ClassFileWriter('com/example/Generic')
+        writer.add_method('of', '([Ljava/lang/Object;)V', ACC_PUBLIC | ACC_VARARGS,
+                          '<T:Ljava/lang/Object;>([TT;)V')
+        writer.add_method('put', '(Ljava/util/Map;)V', signature='(Ljava/util/Map<TK;TV;>;)V')
+        self.assert_same(writer)
+
+    def test_nested_class_signatures(self):
+        writer = ClassFileWriter('com/example/Outer$Inner')
+        writer.add_method('attach', '(Lcom/example/Outer$Inner;Ljava/util/Map$Entry;)V',
+                          signature='(Lcom/example/Outer<TT;>.Inner<TU;>;'
+                                    'Ljava/util/Map$Entry<TK;TV;>;)V')
+
+        this, fields, methods = self.assert_same(writer)
+        self.assertEqual(this, 'com/example/Outer$Inner')
+
+    def test_modified_utf8(self):
+        writer = ClassFileWriter(u'com/example/Caf\xe9')
+        writer.add_field(u'nul\x00')
+        writer.add_field(u'snow☃')
+        writer.add_field(u'smile\U0001f600')
+        writer.add_method(u'gr\xfc\xdfe', '()V')
+
+        this, fields, methods = self.assert_same(writer)
+        self.assertEqual(this, u'com/example/Caf\xe9')
+        self.assertEqual(fields[:2], (u'nul\x00', u'snow☃'))
+
+    def test_synthetic_attribute(self):
+        # javatools only checks the access flags, so methods marked synthetic
+        # by an attribute (as older compilers do) are only skipped by the
+        # scanner
+        writer = ClassFileWriter('com/example/Old')
+        writer.add_method('run', '()V')
+        writer.add_method('access$000', '()V', attributes=[('Synthetic', b'')])
+        data = writer.to_bytes()
+
+        methods = [m[0] for m in scan_class(data)[2]]
+        self.assertEqual(methods, ['run'])
+
+        methods = [m[0] for m in javatools_class_data(data)[2]]
+        self.assertEqual(methods, ['run', 'access$000'])
+
+    def test_support_classes(self):
+        data = support.write_class('com.example.Widget')
+        self.assertEqual(scan_class(data), javatools_class_data(data))
+
+    def test_invalid_class(self):
+        with self.assertRaises(ValueError):
+            scan_class(b'\xca\xfe\xba\xbe' + b'\0' * 6)
+        with self.assertRaises(ValueError):
+            scan_class(b'not a class file')
+
+
+if __name__ == '__main__':
+    unittest.main()
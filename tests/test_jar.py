@@ -0,0 +1,160 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zipfile
+import zlib
+
+from javalink.jar import MappedJarFile
+
+CONTENTS = [
+    ('META-INF/MANIFEST.MF', b'Manifest-Version: 1.0\r\n\r\n'),
+    ('com/example/Widget.class', b'\xca\xfe\xba\xbe' + b'widget' * 100),
+    ('com/example/Empty.class', b''),
+    ('com/example/Gadget.class', b'\xca\xfe\xba\xbe' + bytes(bytearray(range(256)))),
+]
+
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+
+
+def write_raw_zip(path, entries):
+    """Writes a zip file without zipfile, so its flags can be chosen.
+
+    Args:
+        entries: A list of (name, data, flags) tuples. Entries are
+            deflated; entries with the data descriptor flag have zero
+            sizes and CRC in their local header.
+    """
+
+    local = []
+    central = []
+    offset = 0
+    for name, data, flags in entries:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        crc = zlib.crc32(data) & 0xFFFFFFFF
+        values = (crc, len(compressed), len(data))
+
+        header_values = (0, 0, 0) if flags & _FLAG_DATA_DESCRIPTOR else values
+        record = struct.pack('<4s5H3L2H', b'PK\x03\x04', 20, flags, zipfile.ZIP_DEFLATED, 0, 0,
+                             *(header_values + (len(name), 0))) + name + compressed
+        if flags & _FLAG_DATA_DESCRIPTOR:
+            record += struct.pack('<4s3L', b'PK\x07\x08', *values)
+
+        central.append(struct.pack('<4s6H3L5H2L', b'PK\x01\x02', 20, 20, flags,
+                                   zipfile.ZIP_DEFLATED, 0, 0, *(values + (len(name), 0, 0, 0, 0, 0,
+                                                                          offset))) + name)
+        local.append(record)
+        offset += len(record)
+
+    central = b''.join(central)
+    with open(path, 'wb') as f:
+        f.write(b''.join(local))
+        f.write(central)
+        f.write(struct.pack('<4s4H2LH', b'PK\x05\x06', 0, 0, len(entries), len(entries),
+                            len(central), offset, 0))
+
+
+class MappedJarFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.jar')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, compression=zipfile.ZIP_DEFLATED, comment=b''):
+        with zipfile.ZipFile(self.path, 'w', compression, allowZip64=True) as jar:
+            for name, data in CONTENTS:
+                jar.writestr(name, data)
+            jar.comment = comment
+
+    def assert_same_as_zipfile(self):
+        with zipfile.ZipFile(self.path) as expected:
+            with MappedJarFile(self.path) as jar:
+                self.assertEqual(jar.namelist(), expected.namelist())
+                for name in expected.namelist():
+                    self.assertEqual(bytes(jar.read(name)), expected.read(name))
+                    self.assertEqual(jar.getinfo(name).header_offset,
+                                     expected.getinfo(name).header_offset)
+
+    def test_stored_entries(self):
+        self.write(zipfile.ZIP_STORED)
+        self.assert_same_as_zipfile()
+
+    def test_deflated_entries(self):
+        self.write(zipfile.ZIP_DEFLATED)
+        self.assert_same_as_zipfile()
+
+    def test_archive_comment(self):
+        self.write(comment=b'Built by javalink')
+        self.assert_same_as_zipfile()
+
+    def test_archive_comment_with_signature(self):
+        # zipfile can't read these archives
+        self.write(comment=b'PK\x05\x06' + b'\0' * 20)
+        with MappedJarFile(self.path) as jar:
+            self.assertEqual(jar.namelist(), [name for name, _ in CONTENTS])
+            for name, data in CONTENTS:
+                self.assertEqual(bytes(jar.read(name)), data)
+
+    def test_data_descriptor(self):
+        write_raw_zip(self.path, [(name, data, _FLAG_DATA_DESCRIPTOR) for name, data in CONTENTS])
+        self.assert_same_as_zipfile()
+
+    def test_zip64(self):
+        # every size and offset is stored in zip64 records
+        limit = zipfile.ZIP64_LIMIT
+        zipfile.ZIP64_LIMIT = 0
+        try:
+            self.write()
+        finally:
+            zipfile.ZIP64_LIMIT = limit
+
+        with open(self.path, 'rb') as f:
+            self.assertIn(b'PK\x06\x06', f.read())
+        self.assert_same_as_zipfile()
+
+    def test_encrypted_entries_are_rejected(self):
+        entries = [(name, data, 0) for name, data in CONTENTS]
+        entries[1] = (entries[1][0], entries[1][1], _FLAG_ENCRYPTED)
+        write_raw_zip(self.path, entries)
+
+        with MappedJarFile(self.path) as jar:
+            self.assertNotIn('com/example/Widget.class', jar.namelist())
+            with self.assertRaises(KeyError):
+                jar.read('com/example/Widget.class')
+            self.assertEqual(bytes(jar.read('com/example/Gadget.class')), CONTENTS[3][1])
+
+    def test_corrupt_entries(self):
+        self.write(zipfile.ZIP_STORED)
+        with zipfile.ZipFile(self.path) as jar:
+            info = jar.getinfo('com/example/Widget.class')
+            data_offset = info.header_offset + 30 + len(info.filename) + len(info.extra)
+
+        with open(self.path, 'r+b') as f:
+            f.seek(data_offset + 10)
+            f.write(b'X')
+
+        with MappedJarFile(self.path) as jar:
+            with self.assertRaises(zipfile.BadZipfile):
+                jar.read('com/example/Widget.class')
+            self.assertEqual(bytes(jar.read('com/example/Gadget.class')), CONTENTS[3][1])
+
+    def test_missing_entries(self):
+        self.write()
+        with MappedJarFile(self.path) as jar:
+            with self.assertRaises(KeyError):
+                jar.read('com/example/Missing.class')
+
+    def test_not_a_jar(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a jar' * 10)
+        with self.assertRaises(zipfile.BadZipfile):
+            MappedJarFile(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import javalink
+
+
+@unittest.skipIf(sys.platform in ('darwin', 'win32'), 'uses symbolic links to a java binary')
+class FindRtJarTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.bin = os.path.join(self.directory, 'bin')
+        os.makedirs(self.bin)
+
+        self.environ = dict(os.environ)
+        os.environ.pop('JAVA_HOME', None)
+        os.environ['PATH'] = self.bin
+        javalink._javahome_cache.clear()
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        javalink._javahome_cache.clear()
+        shutil.rmtree(self.directory)
+
+    def install(self, name):
+        """Writes a Java installation and returns its lib/modules file."""
+        javahome = os.path.join(self.directory, name)
+        os.makedirs(os.path.join(javahome, 'bin'))
+        os.makedirs(os.path.join(javahome, 'lib'))
+
+        java = os.path.join(javahome, 'bin', 'java')
+        with open(java, 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.chmod(java, 0o755)
+
+        modules = os.path.join(javahome, 'lib', 'modules')
+        open(modules, 'w').close()
+        return modules
+
+    def select(self, name):
+        """Links the java binary on the PATH to an installation."""
+        link = os.path.join(self.bin, 'java')
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(os.path.join(self.directory, name, 'bin', 'java'), link)
+
+    def test_follows_selected_installation(self):
+        first = self.install('jdk-9')
+        second = self.install('jdk-11')
+
+        self.select('jdk-9')
+        self.assertEqual(javalink.find_rt_jar(), first)
+
+        self.select('jdk-11')
+        self.assertEqual(javalink.find_rt_jar(), second)
+
+    def test_java_home(self):
+        self.install('jdk-9')
+        second = self.install('jdk-11')
+        self.select('jdk-9')
+
+        os.environ['JAVA_HOME'] = os.path.join(self.directory, 'jdk-11')
+        self.assertEqual(javalink.find_rt_jar(), second)
+
+    def test_cache_file(self):
+        modules = self.install('jdk-9')
+        self.select('jdk-9')
+        cache_dir = os.path.join(self.directory, 'cache')
+
+        self.assertEqual(javalink.find_rt_jar(), modules)
+        self.assertFalse(os.path.exists(cache_dir))
+
+        javalink._javahome_cache.clear()
+        self.assertEqual(javalink.find_rt_jar(cache_dir=cache_dir), modules)
+        self.assertTrue(os.path.isfile(os.path.join(cache_dir, 'javahome.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
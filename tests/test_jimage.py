@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import support
+
+from synthetic import write_jimage
+
+from javalink.jimage import JImageFile
+from javalink.loader import ClassLoader, ResourceLoader
+
+# enough classes in one image that some of them share a hash bucket
+CLASSES = ['com.example.Widget{}'.format(i) for i in range(64)]
+COMPRESSED = set(CLASSES[::3])
+
+
+def full_name(name):
+    return '/example/{}.class'.format(name.replace('.', '/'))
+
+
+def entry(name):
+    return name.replace('.', '/') + '.class'
+
+
+class JImageTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'modules')
+
+        resources = [(full_name(name), support.write_class(name)) for name in CLASSES]
+        resources.append(('/packages/com.example/example', b''))
+        write_jimage(self.path, resources, [full_name(name) for name in COMPRESSED])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fixture_has_collisions_and_compressed_resources(self):
+        with JImageFile(self.path) as image:
+            redirects = image._redirect
+            self.assertTrue(any(r > 0 for r in redirects), 'no buckets with collisions')
+            self.assertTrue(any(r < 0 for r in redirects), 'no buckets with one entry')
+
+            sizes = [image.getinfo(entry(name)).compress_size for name in CLASSES]
+            self.assertEqual(sum(1 for s in sizes if s), len(COMPRESSED))
+
+    def test_read(self):
+        with JImageFile(self.path) as image:
+            self.assertEqual(sorted(image.namelist()), sorted(entry(n) for n in CLASSES))
+            for name in CLASSES:
+                self.assertEqual(bytes(image.read(entry(name))), support.write_class(name))
+
+    def test_missing_resources(self):
+        with JImageFile(self.path) as image:
+            for name in ('com/example/Missing.class', 'com/missing/Widget0.class',
+                         'Widget0.class', 'packages/com.example/example'):
+                with self.assertRaises(KeyError):
+                    image.read(name)
+
+    def test_resource_loader(self):
+        resources = ResourceLoader([self.path])
+        try:
+            self.assertEqual(sorted(resources.entries), sorted(entry(n) for n in CLASSES))
+            self.assertTrue(resources.has_package('com/example/'))
+            self.assertEqual(resources.locate('com/example/Widget1.class'), 0)
+            self.assertIsNone(resources.locate('com/example/Missing.class'))
+        finally:
+            resources.close()
+
+    def test_class_loader(self):
+        with ClassLoader([self.path]) as loader:
+            for name in CLASSES:
+                clazz = loader.load(name)
+                self.assertEqual(clazz.full_name, name)
+                self.assertIn('run', [m.name for m in clazz.methods])
+
+            self.assertIsNone(loader.load('com.example.Missing'))
+            self.assertIsNone(loader.load('com.missing.Widget0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from javalink.loader import NameTrie
+
+
+class NameTrieTest(unittest.TestCase):
+    def test_resolve(self):
+        names = NameTrie(['a/B.class', 'a/B$C.class', 'a/B$C$D.class', 'a/b/E.class'])
+
+        self.assertEqual(names.resolve('a.B'), 'a.B')
+        self.assertEqual(names.resolve('a.B.C'), 'a.B$C')
+        self.assertEqual(names.resolve('a.B$C.D'), 'a.B$C$D')
+        self.assertEqual(names.resolve('a.b.E'), 'a.b.E')
+
+    def test_missing_names(self):
+        names = NameTrie(['a/B.class', 'a/B$1.class', 'a/B$1Local.class'])
+
+        self.assertIsNone(names.resolve('a'))
+        self.assertIsNone(names.resolve('a.C'))
+        self.assertIsNone(names.resolve('a.B.1'))
+        self.assertIsNone(names.resolve('a.B$1Local'))
+
+    def test_package_class_wins_over_nested_class(self):
+        entries = ['a/B.class', 'a/B$C.class', 'a/B/C.class']
+        for order in (entries, entries[::-1]):
+            names = NameTrie(order)
+            self.assertEqual(names.resolve('a.B.C'), 'a.B.C')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import support
+
+from javalink.ref import _find_local_page
+
+
+TITLE_DOCUMENT = """\
+.. javaimport::
+   com.example.*
+
+Using :javaref:`Widget`
+=======================
+
+:javaref:`Widget#run()` runs the widget.
+"""
+
+
+class ProjectTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        jar = support.write_jar(os.path.join(self.directory, 'widgets.jar'),
+                                ['com.example.Widget'])
+        support.write_docroot(os.path.join(self.directory, 'docs', 'api'),
+                              ['com.example'])
+
+        self.config = {
+            'javalink_classpath': [jar],
+            'javalink_docroots': ['api'],
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, documents, freshenv=True):
+        srcdir = os.path.join(self.directory, 'docs')
+        return support.build(srcdir, self.config, documents, freshenv)
+
+    def build_title(self, deferred):
+        self.config['javalink_deferred_resolution'] = deferred
+        app, warnings = self.build({'index': TITLE_DOCUMENT})
+        return support.read_page(app, 'index'), warnings
+
+    def assert_linked(self, page, warnings):
+        # only warnings about the document; extensions that are set up
+        # again by each application warn about their registrations
+        self.assertNotIn('index.rst', warnings)
+        self.assertIn('href="api/com/example/Widget.html"', page)
+        self.assertIn('href="api/com/example/Widget.html#run()"', page)
+
+    def test_reference_in_title(self):
+        self.assert_linked(*self.build_title(deferred=False))
+
+    def test_deferred_reference_in_title(self):
+        self.assert_linked(*self.build_title(deferred=True))
+
+    def test_unused_references_are_discarded(self):
+        self.build({'index': ':javaref:`com.example.Widget`\n'})
+
+        app, _ = self.build({'index': ':javaref:`com.example.Widget#run()`\n'},
+                            freshenv=False)
+        references = [key[1] for key in app.env.javalink_references]
+        self.assertEqual(references, ['com.example.Widget#run()'])
+
+    def test_package_list_changes_discard_references(self):
+        self.build({'index': ':javaref:`com.example.Widget`\n'})
+        support.write_docroot(os.path.join(self.directory, 'docs', 'api'), ['com.other'])
+
+        app, _ = self.build({'index': 'See :javaref:`com.example.Widget`\n'}, freshenv=False)
+        self.assertNotIn('href="api/com/example/Widget.html"', support.read_page(app, 'index'))
+
+
+class ClasspathChangeTest(unittest.TestCase):
+    """Checks that only documents affected by classpath changes are read again."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.srcdir = os.path.join(self.directory, 'docs')
+
+        self.widgets = support.write_jar(os.path.join(self.directory, 'widgets.jar'),
+                                         ['com.example.Widget'])
+        self.gadgets = support.write_jar(os.path.join(self.directory, 'gadgets.jar'),
+                                         ['com.gadget.Gadget'])
+        support.write_docroot(os.path.join(self.srcdir, 'api'), ['com.example', 'com.gadget'])
+
+        self.config = {
+            'javalink_classpath': [self.widgets, self.gadgets],
+            'javalink_docroots': ['api'],
+        }
+
+        _, warnings = self.build({
+            'index': '.. toctree::\n\n   widget\n   gadget\n',
+            'widget': 'Widget\n======\n\n:javaref:`com.example.Widget#run()`\n',
+            'gadget': 'Gadget\n======\n\n:javaref:`com.gadget.Gadget#run()`\n',
+        }, freshenv=True)
+        self.assertNotIn('.rst', warnings)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, documents=None, freshenv=False):
+        return support.build(self.srcdir, self.config, documents or {}, freshenv)
+
+    def touch(self, path):
+        # make sure the change is seen on file systems with coarse mtimes
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    def test_unchanged_classpath(self):
+        app, _ = self.build()
+        self.assertEqual(app.read_docs, [])
+
+    def test_changed_jar(self):
+        support.write_jar(self.gadgets, ['com.gadget.Gadget'], methods=('stop',))
+        self.touch(self.gadgets)
+
+        app, warnings = self.build()
+        self.assertEqual(app.read_docs, ['gadget'])
+        self.assertIn('gadget.rst:4: WARNING: unknown member', warnings)
+        self.assertNotIn('widget.rst', warnings)
+
+    def test_removed_jar(self):
+        self.config['javalink_classpath'] = [self.widgets]
+
+        app, warnings = self.build()
+        self.assertEqual(app.read_docs, ['gadget'])
+        self.assertIn('gadget.rst:4: WARNING: reference not found', warnings)
+
+    def test_shadowing_class(self):
+        shadow = support.write_jar(os.path.join(self.directory, 'shadow.jar'),
+                                   ['com.example.Widget'], methods=('stop',))
+        self.config['javalink_classpath'] = [shadow, self.widgets, self.gadgets]
+
+        app, warnings = self.build()
+        self.assertEqual(app.read_docs, ['widget'])
+        self.assertIn('widget.rst:4: WARNING: unknown member', warnings)
+        self.assertNotIn('gadget.rst', warnings)
+
+
+class FindLocalPageTest(unittest.TestCase):
+    def test_longest_base_wins(self):
+        directories = {'api/': '/docs/api', 'api/ext/': '/docs/ext'}
+        self.assertEqual(_find_local_page(directories, 'api/ext/com/Ext.html'),
+                         '/docs/ext/com/Ext.html')
+        self.assertEqual(_find_local_page(directories, 'api/com/Core.html'),
+                         '/docs/api/com/Core.html')
+        self.assertIsNone(_find_local_page(directories, 'http://example.com/api/'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import cPickle as pickle
+import os
+import unittest
+
+from javalink.stats import Stats
+
+
+def run_in_child(function):
+    """Calls a function in a forked process and returns its pickled result."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            with os.fdopen(write_fd, 'wb') as f:
+                f.write(pickle.dumps(function(), pickle.HIGHEST_PROTOCOL))
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    return pickle.loads(data)
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+class StatsTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = Stats()
+        self.stats.incr('resources_opened', 3)
+        self.stats._add_time('resolution', 1.5)
+
+    def test_idle_child_adds_nothing(self):
+        child = run_in_child(lambda: self.stats)
+        self.stats.merge(child)
+
+        self.assertEqual(self.stats.counters, {'resources_opened': 3})
+        self.assertEqual(self.stats.timers, {'resolution': 1.5})
+
+    def test_child_counts_are_added_once(self):
+        def work():
+            self.stats.incr('resources_opened')
+            return self.stats
+
+        self.stats.merge(run_in_child(work))
+        self.assertEqual(self.stats.counters, {'resources_opened': 4})
+        self.assertEqual(self.stats.timers, {'resolution': 1.5})
+
+
+if __name__ == '__main__':
+    unittest.main()